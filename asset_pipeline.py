@@ -0,0 +1,183 @@
+"""Build every door sprite and animation into content-hashed static files
+
+    python -m asset_pipeline [--out static]
+
+Streamlit serves ./static next to the app at /app/static/ when
+server.enableStaticServing is on (see .streamlit/config.toml). File names
+carry a hash of their contents, so a CDN or reverse proxy in front of the
+app can cache /app/static/* with `Cache-Control: public, max-age=31536000,
+immutable`; Streamlit itself doesn't set long-lived headers for app files.
+
+The manifest is stamped with a hash of the drawing and encoding code, and
+a manifest from other code counts as missing. Run the command above as a
+deploy step; a replica that starts without current assets serves the
+in-memory sprites while it builds them in the background.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from io import BytesIO
+
+import PIL
+
+import sprites
+from sprites import MAX_DRAWN_DOORS, create_door_image, door_animation_frames
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+MANIFEST = 'manifest.json'
+URL_PREFIX = '/app/static/'
+
+_build_lock = threading.Lock()
+# out_dir -> assets of a manifest matching the current code
+_manifests = {}
+# Directories ready_manifest() already looked at, guarded by _state_lock
+_building = set()
+_state_lock = threading.Lock()
+
+
+def sprite_key(door_num, state='closed', selected=False, opening=False):
+    return f"door-{door_num}-{state}-{int(selected)}-{int(opening)}"
+
+
+def animation_key(is_selected, content):
+    return f"open-{content}-{int(is_selected)}"
+
+
+def sprite_variants():
+    """Every (door_num, state, selected, opening) the door grid can show"""
+    for door_num in range(MAX_DRAWN_DOORS):
+        for selected in (False, True):
+            yield door_num, 'closed', selected, False
+            yield door_num, 'goat', selected, True
+            yield door_num, 'car', selected, True
+
+
+def _encode(img, fmt):
+    buffered = BytesIO()
+    if fmt == 'png':
+        img.save(buffered, format='PNG', optimize=True)
+    else:
+        img.save(buffered, format='WEBP', lossless=True, method=6)
+    return buffered.getvalue()
+
+
+def _encode_animation(frames, fmt, frame_ms=40):
+    buffered = BytesIO()
+    # No loop count, so browsers play the opening once and hold the last frame
+    if fmt == 'gif':
+        frames[0].save(buffered, format='GIF', save_all=True,
+                       append_images=frames[1:], duration=frame_ms)
+    else:
+        frames[0].save(buffered, format='WEBP', save_all=True, append_images=frames[1:],
+                       duration=frame_ms, loop=1, lossless=True)
+    return buffered.getvalue()
+
+
+def _write_hashed(out_dir, name, data, ext):
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    filename = f"{name}.{digest}.{ext}"
+    path = os.path.join(out_dir, filename)
+    # Same name means same bytes, identical variants are only written once
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    return filename
+
+
+def code_stamp(frames=12):
+    """Hash of everything that decides the bytes of the built assets"""
+    digest = hashlib.sha256(f"{PIL.__version__}/{frames}".encode())
+    for path in (sprites.__file__, __file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def build_assets(out_dir=STATIC_DIR, frames=12):
+    """Render all variants, write them under hashed names and return the manifest"""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+
+    for door_num, state, selected, opening in sprite_variants():
+        img = create_door_image(door_num, state, selected, opening)
+        name = sprite_key(door_num, state, selected, opening)
+        manifest[name] = {fmt: _write_hashed(out_dir, 'door', _encode(img, fmt), fmt)
+                          for fmt in ('png', 'webp')}
+
+    for content in ('goat', 'car'):
+        for is_selected in (False, True):
+            images = door_animation_frames(is_selected, content, frames)
+            name = animation_key(is_selected, content)
+            manifest[name] = {fmt: _write_hashed(out_dir, 'open', _encode_animation(images, fmt), fmt)
+                              for fmt in ('gif', 'webp')}
+
+    # The manifest is written last, so readers never see one pointing at missing files
+    tmp_path = os.path.join(out_dir, MANIFEST + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'stamp': code_stamp(frames), 'assets': manifest}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+def _read_manifest(out_dir):
+    """Assets listed in out_dir's manifest, None if it's missing or stale"""
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('stamp') != code_stamp():
+        return None
+    return manifest['assets']
+
+
+def load_manifest(out_dir=STATIC_DIR):
+    """Assets of the manifest in out_dir, rebuilt first if it's missing or stale"""
+    with _build_lock:
+        if out_dir not in _manifests:
+            _manifests[out_dir] = _read_manifest(out_dir) or build_assets(out_dir)
+        return _manifests[out_dir]
+
+
+def ready_manifest(out_dir=STATIC_DIR):
+    """load_manifest() if it's current on disk, otherwise None while it builds in the background"""
+    assets = _manifests.get(out_dir)
+    if assets is not None:
+        return assets
+    with _state_lock:
+        if out_dir in _building:
+            return _manifests.get(out_dir)
+        _building.add(out_dir)
+    assets = _read_manifest(out_dir)
+    if assets is not None:
+        _manifests[out_dir] = assets
+        return assets
+    threading.Thread(target=load_manifest, args=(out_dir,), name='asset-build', daemon=True).start()
+    return None
+
+
+def asset_url(key, fmt='webp', out_dir=STATIC_DIR):
+    """URL of a built asset, or None if it isn't in the manifest or that isn't ready yet"""
+    assets = ready_manifest(out_dir)
+    filename = None if assets is None else assets.get(key, {}).get(fmt)
+    if filename is None:
+        return None
+    return URL_PREFIX + filename
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m asset_pipeline')
+    parser.add_argument('--out', default=STATIC_DIR, help="output directory")
+    args = parser.parse_args(argv)
+    manifest = build_assets(args.out)
+    files = {filename for formats in manifest.values() for filename in formats.values()}
+    size = sum(os.path.getsize(os.path.join(args.out, filename)) for filename in files)
+    print(f"{len(manifest)} variants, {len(files)} files, {size / 1024:.1f} KiB in {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
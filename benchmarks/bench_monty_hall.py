@@ -0,0 +1,117 @@
+"""Throughput and render-latency benchmarks
+
+    python -m benchmarks.bench_monty_hall --output bench.json
+
+Run from the repository root. Results are written as JSON so runs from
+different commits can be diffed or plotted.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from simulation import simulate_games
+from sprites import (create_door_animation, create_door_image, create_monty_hall,
+                     get_image_base64)
+
+SIM_SIZES = [10_000, 1_000_000, 10_000_000]
+SIM_DOORS = [3, 100]
+
+
+def time_call(func, repeat=5, number=1):
+    """Per-call wall time in seconds over `repeat` runs of `number` calls"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {'min': min(samples), 'median': statistics.median(samples)}
+
+
+def peak_memory(func):
+    """Peak traced allocation in bytes while running func once"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_simulation(quick=False):
+    results = []
+    for n_doors in SIM_DOORS:
+        for n_games in SIM_SIZES[:2] if quick else SIM_SIZES:
+            run = lambda: simulate_games(n_games, n_doors=n_doors, seed=0)
+            timing = time_call(run, repeat=3)
+            results.append({
+                'doors': n_doors,
+                'games': n_games,
+                'seconds': timing,
+                'games_per_second': n_games / timing['min'],
+                'peak_bytes': peak_memory(run),
+            })
+    return results
+
+
+def bench_render(quick=False):
+    number = 5 if quick else 50
+    door = create_door_image(0, state='closed', selected=True)
+    cases = {
+        'create_door_image': lambda: create_door_image(0, state='goat', opening=True),
+        'create_door_animation': lambda: create_door_animation(True, 'car', 0.5),
+        'create_monty_hall': lambda: create_monty_hall(1),
+        'get_image_base64': lambda: get_image_base64(door),
+    }
+    results = {}
+    for name, func in cases.items():
+        timing = time_call(func, repeat=5, number=number)
+        results[name] = {
+            'ms_per_call': timing['min'] * 1000,
+            'median_ms_per_call': timing['median'] * 1000,
+            'peak_bytes': peak_memory(func),
+        }
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_monty_hall')
+    parser.add_argument('--output', '-o', default=None,
+                        help="write JSON here instead of stdout")
+    parser.add_argument('--quick', action='store_true',
+                        help="smaller sizes, for a fast smoke run")
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'simulation': bench_simulation(args.quick),
+        'render': bench_render(args.quick),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
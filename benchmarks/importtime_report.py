@@ -0,0 +1,55 @@
+"""Summarize `python -X importtime` for the app's startup imports
+
+    python -m benchmarks.importtime_report [--module monty_hall_streamlit] [--top 20]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.importtime_report')
+    parser.add_argument('--module', default='monty_hall_streamlit')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {args.module}'],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        return proc.returncode
+
+    rows = parse_importtime(proc.stderr)
+    total_us = sum(self_us for _, self_us, _ in rows)
+    top = sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps({
+            'module': args.module,
+            'total_ms': total_us / 1000,
+            'top': [{'module': name, 'self_ms': s / 1000, 'cumulative_ms': c / 1000}
+                    for name, s, c in top],
+        }, indent=2))
+    else:
+        print(f"import {args.module}: {total_us / 1000:.1f} ms total")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for name, self_us, cumulative_us in top:
+            print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""Concurrent-session load test for the Streamlit app
+
+    python -m benchmarks.load_test --sessions 1,10,50,100 --games 10 --output load.json
+
+Run from the repository root. This starts the app with `streamlit run` on
+a local port, or targets `--url` if given. It then opens one WebSocket
+per simulated player, speaking the same protobuf messages as the browser.
+Each player plays full games: pick a door (choose_door and the host
+reveal), stay or switch (process_choice), start a new game, and every
+`--simulate-every` games run an auto-simulate. A player waits for each
+rerun to finish before its next click, and players run concurrently, so
+the numbers show what one server process sustains as sessions are added.
+
+AppTest can't be used for this: it swaps a process-global runtime in and
+out around every run, so two AppTest sessions can't run at once.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+from benchmarks.bench_monty_hall import git_commit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'monty_hall_streamlit.py')
+
+DONE = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR)
+
+
+def percentiles(samples, points=(50, 90, 95, 99)):
+    """{'p50': ..., 'max': ...} in milliseconds from durations in seconds"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {f'p{p}': ordered[min(len(ordered) - 1, len(ordered) * p // 100)] * 1000
+              for p in points}
+    result['max'] = ordered[-1] * 1000
+    return result
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, scratch, timeout=60):
+    """Launch the app headless on `port`, with its stats and game log under `scratch`"""
+    env = dict(os.environ,
+               MONTY_HALL_STATS_DB=os.path.join(scratch, 'stats.db'),
+               MONTY_HALL_GAME_LOG=os.path.join(scratch, 'game_log'))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP, '--server.headless', 'true',
+         '--server.port', str(port), '--server.fileWatcherType', 'none',
+         '--browser.gatherUsageStats', 'false'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1):
+                return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError(f"streamlit exited with code {server.returncode}")
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"streamlit didn't come up on port {port} within {timeout}s")
+
+
+class Session:
+    """One browser-like session: sends widget states, waits for reruns to finish"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        # label -> widget proto from the last finished run
+        self.buttons = {}
+        self.number_inputs = {}
+        # Values the "user" set, resent on every rerun like the browser does
+        self._widget_values = {}
+
+    async def rerun(self, trigger=None):
+        """Rerun the script, optionally clicking a button, and return seconds taken"""
+        msg = BackMsg()
+        msg.rerun_script.SetInParent()
+        for widget_id, value in self._widget_values.items():
+            state = msg.rerun_script.widget_states.widgets.add(id=widget_id)
+            state.int_value = value
+        if trigger is not None:
+            msg.rerun_script.widget_states.widgets.add(id=trigger.id, trigger_value=True)
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        buttons, number_inputs, exception = {}, {}, None
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.ws.recv())
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                element_kind = element.WhichOneof('type')
+                if element_kind == 'button':
+                    buttons[element.button.label] = element.button
+                elif element_kind == 'number_input':
+                    number_inputs[element.number_input.label] = element.number_input
+                elif element_kind == 'exception':
+                    exception = element.exception.message
+            elif kind == 'script_finished':
+                if forward.script_finished in DONE:
+                    break
+                # st.rerun() inside the script, the page is about to be redrawn
+                buttons, number_inputs = {}, {}
+        elapsed = time.perf_counter() - start
+        if exception is not None:
+            raise RuntimeError(exception)
+        self.buttons, self.number_inputs = buttons, number_inputs
+        return elapsed
+
+    def set_number(self, label, value):
+        self._widget_values[self.number_inputs[label].id] = value
+
+    def door_buttons(self):
+        return [button for label, button in self.buttons.items() if label.startswith("Select Door ")]
+
+    def button(self, prefix):
+        for label, button in self.buttons.items():
+            if label.startswith(prefix):
+                return button
+        raise LookupError(f"no button {prefix!r} on the page")
+
+
+class Player:
+    """Plays games over one session and keeps the latency of every rerun"""
+
+    def __init__(self, session, rng, n_doors=3, simulate_games=10_000):
+        self.session = session
+        self.rng = rng
+        self.n_doors = n_doors
+        self.simulate_games = simulate_games
+        self.latencies = {}
+        self.games = 0
+
+    async def _step(self, action, trigger=None):
+        elapsed = await self.session.rerun(trigger)
+        self.latencies.setdefault(action, []).append(elapsed)
+
+    async def open_page(self):
+        await self._step('load')
+        if self.n_doors != 3:
+            self.session.set_number("Number of doors", self.n_doors)
+            await self._step('configure')
+
+    async def play_game(self):
+        # All doors enabled: choosing. Afterwards the opened goats are
+        # disabled, and picking any enabled door stays or switches.
+        doors = [door for door in self.session.door_buttons() if not door.disabled]
+        await self._step('choose_door', self.rng.choice(doors))
+        doors = [door for door in self.session.door_buttons() if not door.disabled]
+        await self._step('process_choice', self.rng.choice(doors))
+        self.games += 1
+        await self._step('new_game', self.session.button("New Game"))
+
+    async def auto_simulate(self):
+        # The button label includes the game count, so setting it reruns first
+        self.session.set_number("Games to simulate", self.simulate_games)
+        await self._step('configure')
+        await self._step('auto_simulate', self.session.button("Auto Simulate"))
+
+    async def play(self, n_games, simulate_every):
+        await self.open_page()
+        for i in range(n_games):
+            await self.play_game()
+            if simulate_every and (i + 1) % simulate_every == 0:
+                await self.auto_simulate()
+
+
+async def _run_player(url, player_args, n_games, simulate_every):
+    async with connect(url, subprotocols=['streamlit'], max_size=None) as ws:
+        player = Player(Session(ws), *player_args)
+        try:
+            await player.play(n_games, simulate_every)
+        except Exception as exc:
+            exc.player = player
+            raise
+        return player
+
+
+async def run_step(url, n_sessions, n_games, simulate_every, simulate_games, n_doors, seed):
+    """Play n_games in each of n_sessions concurrent sessions, return the measurements"""
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        _run_player(url, (random.Random(None if seed is None else seed + i), n_doors,
+                          simulate_games), n_games, simulate_every)
+        for i in range(n_sessions)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    players, errors = [], []
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            errors.append(repr(outcome))
+            outcome = getattr(outcome, 'player', None)
+        if outcome is not None:
+            players.append(outcome)
+    by_action = {}
+    for player in players:
+        for action, samples in player.latencies.items():
+            by_action.setdefault(action, []).extend(samples)
+    all_reruns = [sample for samples in by_action.values() for sample in samples]
+    games = sum(player.games for player in players)
+    return {
+        'sessions': n_sessions,
+        'seconds': elapsed,
+        'reruns': len(all_reruns),
+        'reruns_per_second': len(all_reruns) / elapsed,
+        'games_per_second': games / elapsed,
+        'latency_ms': percentiles(all_reruns),
+        'latency_ms_by_action': {action: percentiles(samples)
+                                 for action, samples in sorted(by_action.items())},
+        'errors': errors[:10],
+        'error_count': len(errors),
+    }
+
+
+def print_table(steps):
+    print(f"{'sessions':>8} {'reruns/s':>9} {'games/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'errors':>6}")
+    for step in steps:
+        latency = step['latency_ms']
+        print(f"{step['sessions']:>8} {step['reruns_per_second']:>9.1f} "
+              f"{step['games_per_second']:>8.1f} {latency.get('p50', 0):>8.1f} "
+              f"{latency.get('p95', 0):>8.1f} {latency.get('p99', 0):>8.1f} "
+              f"{latency.get('max', 0):>8.1f} {step['error_count']:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load_test')
+    parser.add_argument('--sessions', default='1,5,10,25,50',
+                        help="comma-separated concurrent session counts, one step each")
+    parser.add_argument('--games', type=int, default=5, help="games each session plays per step")
+    parser.add_argument('--simulate-every', type=int, default=5,
+                        help="auto-simulate after every this many games, 0 to never")
+    parser.add_argument('--simulate-games', type=int, default=10_000,
+                        help="games per auto-simulate click")
+    parser.add_argument('--doors', type=int, default=3, choices=range(3, 11), metavar='3-10',
+                        help="doors per game, drawn mode only")
+    parser.add_argument('--seed', type=int, default=None, help="seed for the players' choices")
+    parser.add_argument('--url', default=None,
+                        help="WebSocket URL of a running app, e.g. ws://host:8501/_stcore/stream; "
+                             "by default a local server is started")
+    parser.add_argument('--output', '-o', default=None,
+                        help="write JSON here instead of printing a table")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        # Keep the load test's games out of the real statistics and audit log
+        port = free_port()
+        server = start_server(port, tempfile.mkdtemp(prefix='monty_hall_load_'))
+        url = f'ws://127.0.0.1:{port}/_stcore/stream'
+
+    steps = []
+    try:
+        for n_sessions in (int(n) for n in args.sessions.split(',')):
+            step = asyncio.run(run_step(url, n_sessions, args.games, args.simulate_every,
+                                        args.simulate_games, args.doors, args.seed))
+            steps.append(step)
+            print(f"{n_sessions} sessions: {step['reruns_per_second']:.1f} reruns/s, "
+                  f"p95 {step['latency_ms'].get('p95', 0):.1f} ms, "
+                  f"{step['error_count']} errors", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'timestamp': time.time(),
+            'cpu_count': os.cpu_count(),
+            'settings': vars(args),
+            'steps': steps,
+        }
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(report, indent=2) + '\n')
+    else:
+        print_table(steps)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import copy
+import functools
+
+import numpy as np
+
+import startup
+
+# Most points a convergence chart sends per trace, whatever the game count
+POINT_BUDGET = 2_000
+
+
+def _donut(go):
+    fig = go.Figure(layout={'template': 'none'})
+    fig.add_trace(go.Pie(
+        values=[0, 0, 0, 0],
+        labels=['Stay Wins', 'Stay Losses', 'Switch Wins', 'Switch Losses'],
+        hole=0.6,
+        marker_colors=['#2ecc71', '#e74c3c', '#27ae60', '#c0392b'],
+    ))
+    fig.update_layout(
+        annotations=[dict(text='', x=0.5, y=0.5, font_size=20, showarrow=False)],
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        height=500,
+        title={'text': '', 'y': 0.95, 'x': 0.5, 'xanchor': 'center', 'yanchor': 'top'},
+    )
+    return fig
+
+
+def _convergence(go):
+    fig = go.Figure(layout={'template': 'none'})
+    for name in ('Stay', 'Switch'):
+        fig.add_trace(go.Scatter(x=[], y=[], name=name, mode='lines'))
+    fig.update_layout(
+        height=350,
+        margin=dict(t=30, b=40),
+        xaxis=dict(title='Games', type='log'),
+        yaxis=dict(title='Win rate', tickformat='.0%', range=[0, 1]),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    return fig
+
+
+TEMPLATES = {
+    'donut': _donut,
+    'convergence': _convergence,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    # Built and validated by plotly once per process; plain dict from here on
+    go = startup.lazy_import('plotly.graph_objects')
+    return TEMPLATES[name](go).to_dict()
+
+
+def new_figure(name):
+    """Figure for a chart copied from its template, skipping plotly's validation
+
+    The layout uses the empty 'none' template, since st.plotly_chart applies
+    the Streamlit theme anyway, which keeps plotly's default theme out of
+    every payload. Keep the figure and change only its data afterwards.
+    """
+    go = startup.lazy_import('plotly.graph_objects')
+    return go.Figure(copy.deepcopy(_template(name)), _validate=False)
+
+
+def update_donut(fig, wins_stay, total_stay, wins_switch, total_switch):
+    stay_pct = (wins_stay / total_stay * 100) if total_stay > 0 else 0
+    switch_pct = (wins_switch / total_switch * 100) if total_switch > 0 else 0
+    with fig.batch_update():
+        fig.data[0].values = [wins_stay, total_stay - wins_stay, wins_switch, total_switch - wins_switch]
+        fig.layout.annotations[0].text = f'Stay: {stay_pct:.1f}%<br>Switch: {switch_pct:.1f}%'
+        fig.layout.title.text = f"Total Games Played: {total_stay + total_switch}"
+    return fig
+
+
+def update_convergence(fig, stay_series, switch_series):
+    with fig.batch_update():
+        for trace, series in zip(fig.data, (stay_series, switch_series)):
+            trace.x, trace.y = series.points()
+    return fig
+
+
+class ConvergenceSeries:
+    """Running win rate after every game, kept within a point budget
+
+    Games are grouped into buckets of equal width on the chart's log axis,
+    `resolution` of them per doubling of the game count, and only the lowest
+    and highest running rate of each bucket is kept, so the envelope of the
+    full series survives at any length. Once the buckets would exceed the
+    budget, the resolution is halved and neighbouring buckets merged.
+    """
+
+    def __init__(self, budget=POINT_BUDGET, resolution=256):
+        self.budget = budget
+        self.resolution = resolution
+        self.games = 0
+        self.wins = 0
+        # Per bucket: its index on the log axis, and the game number and
+        # rate of its minimum and of its maximum
+        self._ids = np.empty(0, dtype=np.int64)
+        self._buckets = np.empty((0, 4))
+
+    def extend(self, won):
+        """Add a chunk of per-game outcomes"""
+        if len(won) == 0:
+            return
+        x = np.arange(self.games + 1, self.games + len(won) + 1, dtype=np.float64)
+        y = (self.wins + np.cumsum(won)) / x
+        self.games += len(won)
+        self.wins += int(np.count_nonzero(won))
+
+        # Buckets this chunk reaches into; the first may still be open from
+        # the previous chunk, so it's combined with the existing ones below
+        first, last = np.floor(np.log2([x[0], x[-1]]) * self.resolution).astype(np.int64)
+        ids = np.arange(first, last + 1)
+        starts = np.r_[0, np.searchsorted(x, np.exp2(ids[1:] / self.resolution))]
+        ends = np.r_[starts[1:], len(x)]
+        filled = ends > starts
+        ids, starts, ends = ids[filled], starts[filled], ends[filled]
+        rows = np.empty((len(ids), 4))
+        for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            low = start + y[start:end].argmin()
+            high = start + y[start:end].argmax()
+            rows[i] = x[low], y[low], x[high], y[high]
+        self._ids, self._buckets = _envelope(np.concatenate((self._ids, ids)),
+                                             np.concatenate((self._buckets, rows)))
+        while 2 * len(self._ids) > self.budget and self.resolution > 1:
+            self.resolution //= 2
+            self._ids, self._buckets = _envelope(self._ids // 2, self._buckets)
+
+    def points(self):
+        """(games, rates) in game order, at most about `budget` points"""
+        if self.games == 0:
+            return np.empty(0), np.empty(0)
+        x = np.append(self._buckets[:, [0, 2]].ravel(), self.games)
+        y = np.append(self._buckets[:, [1, 3]].ravel(), self.wins / self.games)
+        # Sorted by game number, each game once
+        x, first = np.unique(x, return_index=True)
+        return x, y[first]
+
+
+def _envelope(ids, rows):
+    """Combine (x_min, y_min, x_max, y_max) rows with equal ids, the ids sorted"""
+    new = np.r_[True, ids[1:] != ids[:-1]]
+    starts = np.flatnonzero(new)
+    segment = np.cumsum(new) - 1
+    lows = np.minimum.reduceat(rows[:, 1], starts)
+    highs = np.maximum.reduceat(rows[:, 3], starts)
+    at_low = _first_per_segment(np.flatnonzero(rows[:, 1] == lows[segment]), segment)
+    at_high = _first_per_segment(np.flatnonzero(rows[:, 3] == highs[segment]), segment)
+    return ids[starts], np.column_stack((rows[at_low, 0], lows, rows[at_high, 2], highs))
+
+
+def _first_per_segment(index, segment):
+    """First of the sorted row indexes in each segment"""
+    seg = segment[index]
+    return index[np.r_[True, seg[1:] != seg[:-1]]]
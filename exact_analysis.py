@@ -0,0 +1,206 @@
+import functools
+import math
+from fractions import Fraction
+
+import numpy as np
+
+from randomness import SAMPLER
+
+# Host policies map (n_doors, chosen, car) to {revealed_door: probability}.
+# Player strategies map (n_doors, chosen, revealed, door) to the probability
+# of ending on `door`. Both are plain functions, so custom ones plug in.
+
+
+def standard_host(n_doors, chosen, car):
+    """Opens a uniformly random goat door the player didn't pick"""
+    doors = [d for d in range(n_doors) if d != chosen and d != car]
+    return {d: Fraction(1, len(doors)) for d in doors}
+
+
+def lowest_goat_host(n_doors, chosen, car):
+    """Always opens the lowest-numbered goat door the player didn't pick"""
+    door = next(d for d in range(n_doors) if d != chosen and d != car)
+    return {door: Fraction(1)}
+
+
+def ignorant_host(n_doors, chosen, car):
+    """Opens any door the player didn't pick, possibly the car (Monty Fall)"""
+    doors = [d for d in range(n_doors) if d != chosen]
+    return {d: Fraction(1, len(doors)) for d in doors}
+
+
+def stay(n_doors, chosen, revealed, door):
+    return Fraction(int(door == chosen))
+
+
+def switch(n_doors, chosen, revealed, door):
+    """Switch to a uniformly random other closed door"""
+    if door == chosen or door == revealed:
+        return Fraction(0)
+    return Fraction(1, n_doors - 2)
+
+
+def coin_flip(n_doors, chosen, revealed, door):
+    """Stay or switch with equal probability"""
+    return (stay(n_doors, chosen, revealed, door) + switch(n_doors, chosen, revealed, door)) / 2
+
+
+# name -> (function, symmetric): a symmetric policy or strategy treats
+# door numbers interchangeably, which lets whole subtrees be shared
+HOST_POLICIES = {
+    'standard': (standard_host, True),
+    'lowest_goat': (lowest_goat_host, False),
+    'ignorant': (ignorant_host, True),
+}
+STRATEGIES = {
+    'stay': (stay, True),
+    'switch': (switch, True),
+    'coin_flip': (coin_flip, True),
+}
+
+# Asymmetric trees have a subtree per (chosen, car) pair
+MAX_ASYMMETRIC_DOORS = 300
+# Most games x doors simulate_policy is asked for from the app; asymmetric
+# policies build an O(doors) table for every distinct pair the games hit
+MAX_SIMULATED_DOOR_GAMES = 50_000_000
+
+
+def _subtree(host, strategy, n_doors, chosen, car):
+    """(P(win), P(car revealed)) once the car and the first pick are fixed"""
+    win = Fraction(0)
+    car_revealed = Fraction(0)
+    for revealed, p_reveal in host(n_doors, chosen, car).items():
+        if revealed == car:
+            car_revealed += p_reveal
+            continue
+        win += p_reveal * strategy(n_doors, chosen, revealed, car)
+    return win, car_revealed
+
+
+def analyze(host='standard', strategy='switch', n_doors=3):
+    """Exact win probabilities from the full game tree
+
+    The car and the first pick are uniform over the doors. When both the
+    host and the strategy are symmetric, every subtree only depends on
+    whether the first pick hit the car, so two subtrees cover all N^2.
+    'win_given_goat' conditions on the host revealing a goat, which is the
+    classic Monty Fall question.
+    """
+    return dict(_analyze(host, strategy, n_doors))
+
+
+# Whole trees are cached rather than subtrees: an asymmetric tree at
+# MAX_ASYMMETRIC_DOORS has 90,000 of them, and reruns ask for the same trees
+@functools.lru_cache(maxsize=256)
+def _analyze(host, strategy, n_doors):
+    host, host_symmetric = HOST_POLICIES.get(host, (host, False))
+    strategy, strategy_symmetric = STRATEGIES.get(strategy, (strategy, False))
+    if n_doors < 3:
+        raise ValueError(f"need at least 3 doors, got {n_doors}")
+
+    if host_symmetric and strategy_symmetric:
+        hit = _subtree(host, strategy, n_doors, 0, 0)
+        miss = _subtree(host, strategy, n_doors, 0, 1)
+        p_hit = Fraction(1, n_doors)
+        win = p_hit * hit[0] + (1 - p_hit) * miss[0]
+        car_revealed = p_hit * hit[1] + (1 - p_hit) * miss[1]
+    else:
+        if n_doors > MAX_ASYMMETRIC_DOORS:
+            raise ValueError(f"asymmetric analysis is limited to {MAX_ASYMMETRIC_DOORS} doors")
+        win = Fraction(0)
+        car_revealed = Fraction(0)
+        for chosen in range(n_doors):
+            for car in range(n_doors):
+                sub_win, sub_revealed = _subtree(host, strategy, n_doors, chosen, car)
+                win += sub_win
+                car_revealed += sub_revealed
+        win /= n_doors * n_doors
+        car_revealed /= n_doors * n_doors
+
+    goat = 1 - car_revealed
+    return {
+        'win': win,
+        'car_revealed': car_revealed,
+        'win_given_goat': win / goat if goat else Fraction(0),
+    }
+
+
+def _table(distribution):
+    """(doors, cumulative float probabilities) of a {door: probability} distribution"""
+    doors = [door for door, p in distribution.items() if p]
+    cumulative = np.cumsum([float(distribution[door]) for door in doors])
+    return np.array(doors, dtype=np.int64), cumulative
+
+
+def _draw_by_class(classes, u, table):
+    """Door per game from uniform draws u, building one table per distinct class
+
+    `table(class)` gives the (doors, cumulative) table for a class; games of
+    a class are drawn together with one searchsorted.
+    """
+    drawn = np.empty(len(classes), dtype=np.int64)
+    keys, inverse = np.unique(classes, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+    for i, key in enumerate(keys.tolist()):
+        games = order[bounds[i]:bounds[i + 1]]
+        doors, cumulative = table(key)
+        # The first door whose running total exceeds u; clipping only matters
+        # when rounding leaves the total just under 1
+        picked = np.searchsorted(cumulative, u[games], side='right')
+        drawn[games] = doors[np.minimum(picked, len(doors) - 1)]
+    return drawn
+
+
+def simulate_policy(host='standard', strategy='switch', n_doors=3, n_games=10_000, rng=SAMPLER):
+    """Monte Carlo wins for the same host and strategy, to check against analyze()
+
+    Games are grouped by what the host and the player get to see, so each
+    distribution is built and turned into a cumulative table once per
+    (chosen, car) or (chosen, revealed) pair rather than once per game.
+    Symmetric policies and strategies only care whether doors coincide, so
+    their games are first relabelled onto a handful of canonical pairs.
+    `rng` is a DoorSampler or a numpy Generator.
+    """
+    host, host_symmetric = HOST_POLICIES.get(host, (host, False))
+    strategy, strategy_symmetric = STRATEGIES.get(strategy, (strategy, False))
+    cars = rng.integers(n_doors, size=n_games)
+    chosen = rng.integers(n_doors, size=n_games)
+    host_draws = rng.random(n_games)
+    player_draws = rng.random(n_games)
+
+    if host_symmetric and strategy_symmetric:
+        # Pick door 0 and put the car behind it or behind door 1
+        cars = (cars != chosen).astype(np.int64)
+        chosen = np.zeros(n_games, dtype=np.int64)
+    revealed = _draw_by_class(
+        chosen * n_doors + cars, host_draws,
+        lambda key: _table(host(n_doors, *divmod(key, n_doors))))
+
+    goat = revealed != cars
+    cars, chosen, revealed, player_draws = cars[goat], chosen[goat], revealed[goat], player_draws[goat]
+    if strategy_symmetric:
+        # Pick door 0, door 1 opened, the car behind 0 or 2
+        cars = np.where(cars == chosen, 0, 2)
+        chosen = np.zeros(len(cars), dtype=np.int64)
+        revealed = np.ones(len(cars), dtype=np.int64)
+
+    def strategy_table(key):
+        first, opened = divmod(key, n_doors)
+        return _table({d: strategy(n_doors, first, opened, d) for d in range(n_doors)})
+
+    final = _draw_by_class(chosen * n_doors + revealed, player_draws, strategy_table)
+    return {'wins': int(np.count_nonzero(final == cars)), 'games': n_games}
+
+
+def compare(exact, wins, games):
+    """How far a Monte Carlo estimate sits from the exact probability"""
+    p = float(exact)
+    estimate = wins / games if games else 0.0
+    std_error = math.sqrt(p * (1 - p) / games) if games else 0.0
+    return {
+        'exact': p,
+        'estimate': estimate,
+        'error': estimate - p,
+        'z_score': (estimate - p) / std_error if std_error else 0.0,
+    }
@@ -0,0 +1,110 @@
+from randomness import SAMPLER
+
+
+def check_config(n_doors, n_reveals):
+    """Validate a door/reveal combination, the host must leave a door to switch to"""
+    if n_doors < 3:
+        raise ValueError(f"need at least 3 doors, got {n_doors}")
+    if not 1 <= n_reveals <= n_doors - 2:
+        raise ValueError(f"host can open between 1 and {n_doors - 2} doors, got {n_reveals}")
+
+
+def analytic_win_probability(n_doors=3, n_reveals=1):
+    """Exact win probability of staying and of switching to a random closed door"""
+    check_config(n_doors, n_reveals)
+    stay = 1 / n_doors
+    switch = (n_doors - 1) / (n_doors * (n_doors - 1 - n_reveals))
+    return {'stay': stay, 'switch': switch}
+
+
+def place_car(n_doors=3, rng=SAMPLER):
+    """Hide the car behind a random door"""
+    return rng.randrange(n_doors)
+
+
+def _sample_excluding(n, k, excluded, rng):
+    """Draw k distinct values from range(n) minus excluded in O(k) (Floyd's algorithm)"""
+    m = n - len(excluded)
+    picks = set()
+    for j in range(m - k, m):
+        t = rng.randrange(j + 1)
+        picks.add(j if t in picks else t)
+
+    # Map indices over the reduced range back onto door numbers
+    doors = []
+    skip = sorted(excluded)
+    for index in picks:
+        for door in skip:
+            if index >= door:
+                index += 1
+        doors.append(index)
+    return doors
+
+
+class HostReveal:
+    """Doors the host opened, stored as whichever side is smaller
+
+    With K reveals out of N doors either the open doors or the doors left
+    closed can number close to N, so only the shorter list is kept.
+    """
+    __slots__ = ('n_doors', 'chosen', 'doors', 'lists_open')
+
+    def __init__(self, n_doors, chosen, doors, lists_open):
+        self.n_doors = n_doors
+        self.chosen = chosen
+        self.doors = frozenset(doors)
+        self.lists_open = lists_open
+
+    @property
+    def n_open(self):
+        if self.lists_open:
+            return len(self.doors)
+        return self.n_doors - 1 - len(self.doors)
+
+    def is_open(self, door):
+        if door == self.chosen:
+            return False
+        return (door in self.doors) == self.lists_open
+
+    def first_open(self):
+        """Lowest-numbered open door, without listing every open door"""
+        if self.lists_open:
+            return min(self.doors)
+        return next(i for i in range(self.n_doors) if self.is_open(i))
+
+    def open_doors(self):
+        """Sorted open doors, only cheap when the open side is the one listed"""
+        if self.lists_open:
+            return sorted(self.doors)
+        return [i for i in range(self.n_doors) if self.is_open(i)]
+
+    def closed_doors(self):
+        """Sorted closed doors other than the chosen one"""
+        if not self.lists_open:
+            return sorted(self.doors)
+        return [i for i in range(self.n_doors) if i != self.chosen and i not in self.doors]
+
+
+def reveal_goats(n_doors, chosen, car, n_reveals=1, rng=SAMPLER):
+    """Host opens n_reveals goat doors, never the chosen door or the car"""
+    check_config(n_doors, n_reveals)
+    n_closed = n_doors - 1 - n_reveals
+    if n_reveals <= n_closed:
+        doors = _sample_excluding(n_doors, n_reveals, {chosen, car}, rng)
+        return HostReveal(n_doors, chosen, doors, lists_open=True)
+
+    # Fewer doors stay closed than open: pick those instead, the car must be one
+    if car == chosen:
+        doors = _sample_excluding(n_doors, n_closed, {chosen}, rng)
+    else:
+        doors = [car] + _sample_excluding(n_doors, n_closed - 1, {chosen, car}, rng)
+    return HostReveal(n_doors, chosen, doors, lists_open=False)
+
+
+def switch_door(reveal, rng=SAMPLER):
+    """Pick a random closed door other than the chosen one"""
+    if not reveal.lists_open:
+        return rng.choice(sorted(reveal.doors))
+    excluded = set(reveal.doors) | {reveal.chosen}
+    return _sample_excluding(reveal.n_doors, 1, excluded, rng)[0]
+
@@ -0,0 +1,219 @@
+"""Append-only columnar log of played games
+
+Each game variant, a door count and a reveal count, gets its own partition
+directory holding one raw file per column, fixed-width uint8 (uint32 above
+256 doors). Files are only ever
+appended to and are read back with numpy.memmap, so analyses stream over
+billions of games without loading them into memory.
+
+    python -m game_log analyze [LOG_DIR] [--json]
+"""
+import argparse
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+
+import numpy as np
+
+# revealed_door is the lowest door the host opened. With more than one reveal
+# the others aren't logged, so the host check only covers that door.
+COLUMNS = ('car_position', 'chosen_door', 'revealed_door', 'final_choice', 'strategy')
+STRATEGY_CODES = {'stay': 0, 'switch': 1}
+STRATEGY_NAMES = {code: name for name, code in STRATEGY_CODES.items()}
+
+# Rows per chunk when scanning a log
+SCAN_CHUNK = 1 << 24
+
+
+def column_dtype(n_doors):
+    return np.dtype(np.uint8 if n_doors <= 256 else np.uint32)
+
+
+def _partition_variant(name):
+    """(n_doors, n_reveals) of a partition directory name, None if it isn't one
+
+    Logs from before reveals were recorded have plain 'doors-N' partitions,
+    which come back with n_reveals None.
+    """
+    parts = name.split('-')
+    if len(parts) == 4 and parts[0] == 'doors' and parts[2] == 'reveals' \
+            and parts[1].isdigit() and parts[3].isdigit():
+        return int(parts[1]), int(parts[3])
+    if len(parts) == 2 and parts[0] == 'doors' and parts[1].isdigit():
+        return int(parts[1]), None
+    return None
+
+
+class GameLog:
+    """Buffered appender for a log directory"""
+
+    def __init__(self, root='game_log', flush_every=1000):
+        self.root = root
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._pending = {}  # (n_doors, n_reveals) -> list of row tuples
+        self._pending_count = 0
+        atexit.register(self.flush)
+
+    def partition(self, n_doors, n_reveals):
+        return os.path.join(self.root, f"doors-{n_doors}-reveals-{n_reveals}")
+
+    def append(self, n_doors, n_reveals, car_position, chosen_door, revealed_door, final_choice,
+               strategy):
+        """Buffer one finished game, strategy is 'stay' or 'switch'"""
+        row = (car_position, chosen_door, revealed_door, final_choice, STRATEGY_CODES[strategy])
+        with self._lock:
+            self._pending.setdefault((n_doors, n_reveals), []).append(row)
+            self._pending_count += 1
+            if self._pending_count >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        for (n_doors, n_reveals), rows in self._pending.items():
+            if rows:
+                self._write(n_doors, n_reveals, dict(zip(COLUMNS, zip(*rows))))
+        self._pending = {}
+        self._pending_count = 0
+
+    def _write(self, n_doors, n_reveals, columns):
+        path = self.partition(n_doors, n_reveals)
+        os.makedirs(path, exist_ok=True)
+        files = _column_files(path, n_doors)
+        # A write cut short leaves some columns longer. Appending after it
+        # would shift those columns against the others for good, so the
+        # partial row is dropped first.
+        rows = _whole_rows(files)
+        for file_path, dtype in files.values():
+            if os.path.exists(file_path) and os.path.getsize(file_path) > rows * dtype.itemsize:
+                os.truncate(file_path, rows * dtype.itemsize)
+        for name, (file_path, dtype) in files.items():
+            values = np.asarray(columns[name], dtype=dtype)
+            with open(file_path, 'ab') as f:
+                f.write(values.tobytes())
+
+
+def _column_files(path, n_doors):
+    """{column: (file path, dtype)} of a partition"""
+    door_dtype = column_dtype(n_doors)
+    return {name: (os.path.join(path, f"{name}.bin"),
+                   np.dtype(np.uint8) if name == 'strategy' else door_dtype)
+            for name in COLUMNS}
+
+
+def _whole_rows(files):
+    """Rows present in every column file, missing files count as empty"""
+    return min(os.path.getsize(file_path) // dtype.itemsize if os.path.exists(file_path) else 0
+               for file_path, dtype in files.values())
+
+
+def open_partition(path, n_doors):
+    """Memory-mapped, read-only columns of one partition"""
+    files = _column_files(path, n_doors)
+    # Only whole rows count, a write cut short may have left a partial one
+    rows = _whole_rows(files)
+    if rows == 0:
+        return {}
+    return {name: np.memmap(file_path, dtype=dtype, mode='r', shape=(rows,))
+            for name, (file_path, dtype) in files.items()}
+
+
+def chi_square_uniform(counts):
+    """Chi-square statistic and approximate p-value against a uniform distribution"""
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    df = len(counts) - 1
+    if total == 0 or df < 1:
+        return 0.0, 1.0
+    expected = total / len(counts)
+    statistic = float(((counts - expected) ** 2 / expected).sum())
+    # Wilson-Hilferty: (X/df)^(1/3) is close to normal
+    z = ((statistic / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return statistic, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def analyze_partition(path, n_doors, n_reveals=None):
+    """Stay/switch statistics and fairness checks for one game variant"""
+    columns = open_partition(path, n_doors)
+    stats = {name: {'wins': 0, 'games': 0} for name in STRATEGY_CODES}
+    car_counts = np.zeros(n_doors, dtype=np.int64)
+    host_errors = 0
+    total = len(columns['strategy']) if columns else 0
+
+    for start in range(0, total, SCAN_CHUNK):
+        chunk = {name: column[start:start + SCAN_CHUNK] for name, column in columns.items()}
+        won = chunk['final_choice'] == chunk['car_position']
+        for name, code in STRATEGY_CODES.items():
+            played = chunk['strategy'] == code
+            stats[name]['games'] += int(np.count_nonzero(played))
+            stats[name]['wins'] += int(np.count_nonzero(won & played))
+        car_counts += np.bincount(chunk['car_position'], minlength=n_doors)[:n_doors]
+        # The host must never open the car or the player's door
+        host_errors += int(np.count_nonzero(
+            (chunk['revealed_door'] == chunk['car_position'])
+            | (chunk['revealed_door'] == chunk['chosen_door'])))
+
+    statistic, p_value = chi_square_uniform(car_counts)
+    for entry in stats.values():
+        entry['win_rate'] = entry['wins'] / entry['games'] if entry['games'] else 0.0
+    return {
+        'doors': n_doors,
+        'reveals': n_reveals,
+        'games': total,
+        'strategies': stats,
+        'car_position_chi2': statistic,
+        'car_position_p_value': p_value,
+        'host_errors': host_errors,
+        # Only the lowest opened door is logged, see COLUMNS
+        'host_check_complete': n_reveals == 1,
+    }
+
+
+def analyze(root='game_log'):
+    """analyze_partition() for every game variant in the log"""
+    names = os.listdir(root) if os.path.isdir(root) else []
+    partitions = []
+    for name in names:
+        variant = _partition_variant(name)
+        if variant is not None:
+            partitions.append((variant, name))
+    # Legacy partitions without a reveal count sort first for their door count
+    partitions.sort(key=lambda item: (item[0][0], item[0][1] or 0))
+    return [analyze_partition(os.path.join(root, name), *variant) for variant, name in partitions]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game_log')
+    commands = parser.add_subparsers(dest='command', required=True)
+    analyze_cmd = commands.add_parser('analyze', help="replay a log and recompute statistics")
+    analyze_cmd.add_argument('root', nargs='?', default='game_log')
+    analyze_cmd.add_argument('--json', action='store_true', help="print JSON")
+    args = parser.parse_args(argv)
+
+    reports = analyze(args.root)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return 0
+    if not reports:
+        print(f"no games logged in {args.root}")
+    for report in reports:
+        reveals = ("reveals not recorded" if report['reveals'] is None
+                   else f"{report['reveals']} opened")
+        print(f"{report['doors']} doors, {reveals}: {report['games']:,} games")
+        for name, entry in report['strategies'].items():
+            print(f"  {name:>6}: {entry['wins']:,}/{entry['games']:,} wins ({entry['win_rate']:.2%})")
+        print(f"  car position uniformity: chi2 = {report['car_position_chi2']:.2f}, "
+              f"p = {report['car_position_p_value']:.3f}")
+        scope = "" if report['host_check_complete'] else " (lowest opened door only)"
+        print(f"  host reveal errors: {report['host_errors']}{scope}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import struct
+from array import array
+
+from game_engine import HostReveal, check_config, place_car, reveal_goats
+from randomness import ALGORITHMS, DoorSampler
+
+PHASES = ('choosing', 'deciding', 'finished')
+
+# Bits of an outcome in the history ring buffer
+WON = 1
+SWITCHED = 2
+
+NO_DOOR = 0xFFFFFFFF
+
+# version, n_doors, n_reveals, phase, car, chosen, animated mask,
+# stay wins/games, switch wins/games, history size/next/len,
+# reveal kind (0 none, 1 open doors listed, 2 closed doors listed), reveal chosen, reveal count,
+# RNG algorithm, seed (128 bits), game start and current stream position
+_HEADER = struct.Struct('<BIIBIIQQQQQHHHBIIB16sQQ')
+_VERSION = 2
+_ALGORITHMS = list(ALGORITHMS)
+
+
+class GameState:
+    """One session's game and counters in a single slotted object
+
+    Replaces a handful of separate session_state keys and two counter
+    dicts. The last `history_size` outcomes are kept in a fixed bytearray
+    ring buffer, and to_bytes()/from_bytes() give a compact binary form for
+    persisting sessions.
+
+    Every draw comes from the session's own seeded DoorSampler, and
+    `game_key` records the variant, the first pick and where in its stream
+    the current game started, so from_key() replays the game exactly.
+    """
+    __slots__ = ('n_doors', 'n_reveals', 'phase', 'car_position', 'chosen_door', 'reveal',
+                 'animated', 'stay_wins', 'stay_games', 'switch_wins', 'switch_games',
+                 'rng', 'game_start', '_history', '_history_next', '_history_len')
+
+    def __init__(self, n_doors=3, n_reveals=1, history_size=64, rng=None):
+        self.n_doors = n_doors
+        self.n_reveals = n_reveals
+        self.rng = DoorSampler() if rng is None else rng
+        self._history = bytearray(history_size)
+        self.reset_stats()
+        self.new_game()
+
+    @classmethod
+    def from_key(cls, key, n_doors=None, n_reveals=None):
+        """Fresh state whose game is the one recorded under `key`
+
+        The key holds the variant, so n_doors and n_reveals only check it:
+        a key from another variant raises ValueError rather than replaying
+        a different game. A key with a first pick replays the host's reveal.
+        """
+        try:
+            key_doors, key_reveals, pick, stream = key.strip().split('-', 3)
+            key_doors, key_reveals = int(key_doors), int(key_reveals)
+            pick = None if pick == '_' else int(pick) - 1
+        except ValueError:
+            raise ValueError(f"malformed game key {key!r}") from None
+        if (n_doors, n_reveals) != (None, None) and (n_doors, n_reveals) != (key_doors, key_reveals):
+            raise ValueError(f"game key {key!r} is for {key_doors} doors with {key_reveals} "
+                             f"opened, not {n_doors} with {n_reveals}")
+        check_config(key_doors, key_reveals)
+        if pick is not None and not 0 <= pick < key_doors:
+            raise ValueError(f"game key {key!r} picks a door outside 1-{key_doors}")
+
+        state = cls(key_doors, key_reveals, history_size=0, rng=DoorSampler.from_key(stream))
+        if pick is not None:
+            state.chosen_door = pick
+            state.reveal = reveal_goats(key_doors, pick, state.car_position, key_reveals, state.rng)
+            state.phase = 'deciding'
+        return state
+
+    @property
+    def first_pick(self):
+        """The door picked before the host opened any, None until then"""
+        return None if self.reveal is None else self.reveal.chosen
+
+    @property
+    def game_key(self):
+        """'doors-reveals-pick-algorithm-seed-position', the pick 1-based or '_' before it's made"""
+        pick = '_' if self.first_pick is None else self.first_pick + 1
+        return f"{self.n_doors}-{self.n_reveals}-{pick}-{self.rng.key(self.game_start)}"
+
+    def new_game(self):
+        self.phase = 'choosing'
+        self.game_start = self.rng.position
+        self.car_position = place_car(self.n_doors, self.rng)
+        self.chosen_door = None
+        self.reveal = None
+        self.animated = 0
+
+    def reset_stats(self):
+        self.stay_wins = self.stay_games = 0
+        self.switch_wins = self.switch_games = 0
+        self._history_next = self._history_len = 0
+
+    def counts(self, strategy):
+        """(wins, games) for 'stay' or 'switch'"""
+        if strategy == 'switch':
+            return self.switch_wins, self.switch_games
+        return self.stay_wins, self.stay_games
+
+    def add(self, strategy, wins, games):
+        """Add batch results, which don't go into the history"""
+        if strategy == 'switch':
+            self.switch_wins += wins
+            self.switch_games += games
+        else:
+            self.stay_wins += wins
+            self.stay_games += games
+
+    def record(self, strategy, won):
+        """Count one finished game and push it onto the history"""
+        self.add(strategy, int(won), 1)
+        if self._history:
+            outcome = (WON if won else 0) | (SWITCHED if strategy == 'switch' else 0)
+            self._history[self._history_next] = outcome
+            self._history_next = (self._history_next + 1) % len(self._history)
+            self._history_len = min(self._history_len + 1, len(self._history))
+
+    def history(self):
+        """Recent (won, switched) outcomes, oldest first"""
+        size = len(self._history)
+        start = (self._history_next - self._history_len) % size if size else 0
+        return [(bool(self._history[(start + i) % size] & WON),
+                 bool(self._history[(start + i) % size] & SWITCHED))
+                for i in range(self._history_len)]
+
+    def mark_animated(self, door):
+        """True the first time a door's opening is shown in this game"""
+        if door >= 64:
+            return False
+        bit = 1 << door
+        if self.animated & bit:
+            return False
+        self.animated |= bit
+        return True
+
+    def to_bytes(self):
+        reveal = self.reveal
+        if reveal is None:
+            kind, reveal_chosen, doors = 0, NO_DOOR, array('I')
+        else:
+            kind = 1 if reveal.lists_open else 2
+            reveal_chosen, doors = reveal.chosen, array('I', sorted(reveal.doors))
+        header = _HEADER.pack(
+            _VERSION, self.n_doors, self.n_reveals, PHASES.index(self.phase),
+            self.car_position, NO_DOOR if self.chosen_door is None else self.chosen_door,
+            self.animated, self.stay_wins, self.stay_games, self.switch_wins, self.switch_games,
+            len(self._history), self._history_next, self._history_len,
+            kind, reveal_chosen, len(doors),
+            _ALGORITHMS.index(self.rng.algorithm), self.rng.seed.to_bytes(16, 'little'),
+            self.game_start, self.rng.position)
+        return header + bytes(self._history) + doors.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        (version, n_doors, n_reveals, phase, car, chosen, animated,
+         stay_wins, stay_games, switch_wins, switch_games,
+         history_size, history_next, history_len,
+         kind, reveal_chosen, n_reveal_doors,
+         algorithm, seed, game_start, position) = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"unsupported game state version {version}")
+
+        state = cls.__new__(cls)
+        state.n_doors = n_doors
+        state.n_reveals = n_reveals
+        state.phase = PHASES[phase]
+        state.car_position = car
+        state.chosen_door = None if chosen == NO_DOOR else chosen
+        state.animated = animated
+        state.stay_wins, state.stay_games = stay_wins, stay_games
+        state.switch_wins, state.switch_games = switch_wins, switch_games
+        state.rng = DoorSampler(int.from_bytes(seed, 'little'), _ALGORITHMS[algorithm], position)
+        state.game_start = game_start
+
+        offset = _HEADER.size
+        state._history = bytearray(data[offset:offset + history_size])
+        state._history_next, state._history_len = history_next, history_len
+        offset += history_size
+
+        if kind == 0:
+            state.reveal = None
+        else:
+            doors = array('I')
+            doors.frombytes(data[offset:offset + doors.itemsize * n_reveal_doors])
+            state.reveal = HostReveal(n_doors, reveal_chosen, doors, lists_open=kind == 1)
+        return state
@@ -0,0 +1,82 @@
+"""Run Monty Hall simulations without Streamlit
+
+    python -m monty_hall_cli --trials 10000000 --doors 3 --workers 8 --seed 1
+"""
+import argparse
+import json
+import sys
+import time
+
+from game_engine import analytic_win_probability
+from randomness import ALGORITHMS, DEFAULT_ALGORITHM
+from simulation import simulate_games
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m monty_hall_cli',
+                                     description="Batch Monty Hall simulation")
+    parser.add_argument('--trials', type=int, default=1_000_000,
+                        help="number of games to simulate")
+    parser.add_argument('--doors', type=int, default=3, help="number of doors")
+    parser.add_argument('--reveals', type=int, default=1,
+                        help="goat doors the host opens")
+    parser.add_argument('--strategy', choices=['stay', 'switch', 'both'], default='both')
+    parser.add_argument('--seed', type=int, default=None,
+                        help="master seed, results are reproducible for any worker count")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes")
+    parser.add_argument('--rng', choices=list(ALGORITHMS), default=DEFAULT_ALGORITHM,
+                        help="bit generator behind the simulation")
+    parser.add_argument('--output', '-o', default=None,
+                        help="write JSON here instead of stdout")
+    return parser
+
+
+def run(args):
+    start = time.perf_counter()
+    results = simulate_games(args.trials, n_doors=args.doors, n_reveals=args.reveals,
+                             seed=args.seed, workers=args.workers, algorithm=args.rng)
+    elapsed = time.perf_counter() - start
+
+    analytic = analytic_win_probability(args.doors, args.reveals)
+    strategies = ['stay', 'switch'] if args.strategy == 'both' else [args.strategy]
+    report = {
+        'trials': args.trials,
+        'doors': args.doors,
+        'reveals': args.reveals,
+        'seed': args.seed,
+        'rng': args.rng,
+        'workers': args.workers,
+        'elapsed_seconds': elapsed,
+        'results': {},
+    }
+    for strategy in strategies:
+        wins = results[strategy]['wins']
+        games = results[strategy]['games']
+        report['results'][strategy] = {
+            'wins': wins,
+            'games': games,
+            'win_rate': wins / games if games else 0.0,
+            'analytic': analytic[strategy],
+        }
+    return report
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        report = run(args)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,174 +1,280 @@
+import time
+import startup
+# Each rerun re-executes this script, time it from the very top
+run_started = time.perf_counter()
+
 import streamlit as st
-import random
-from PIL import Image, ImageDraw
 import os
-import time
-import base64
-from io import BytesIO
-from create_images import save_images
-import plotly.graph_objects as go
-
-# Initialize session state
-if 'stats_switch' not in st.session_state:
-    st.session_state.stats_switch = {'wins': 0, 'games': 0}
-if 'stats_stay' not in st.session_state:
-    st.session_state.stats_stay = {'wins': 0, 'games': 0}
-if 'game_state' not in st.session_state:
-    st.session_state.game_state = 'choosing'
-if 'car_position' not in st.session_state:
-    st.session_state.car_position = random.randint(0, 2)
-if 'chosen_door' not in st.session_state:
-    st.session_state.chosen_door = None
-if 'revealed_door' not in st.session_state:
-    st.session_state.revealed_door = None
-
-def create_door_image(door_num, state='closed', selected=False, opening=False):
-    width, height = 200, 300
-    img = Image.new('RGB', (width, height), '#34495E')
-    draw = ImageDraw.Draw(img)
-    
-    # First draw what's behind the door
-    if state == 'car':
-        # Draw car
-        draw.rectangle([0, 0, width, height], fill='#2C3E50')  # Background
-        # Car body
-        draw.rectangle([40, 120, 160, 170], fill='#E74C3C')
-        draw.polygon([(60, 120), (140, 120), (130, 80), (70, 80)], fill='#E74C3C')
-        # Windows
-        draw.polygon([(75, 85), (125, 85), (115, 115), (85, 115)], fill='#85C1E9')
-        # Wheels
-        draw.ellipse([50, 150, 80, 180], fill='#2C3E50', outline='white', width=2)
-        draw.ellipse([120, 150, 150, 180], fill='#2C3E50', outline='white', width=2)
-        draw.text((100, 280), "CAR!", fill='white', anchor="ms")
-    elif state == 'goat' or opening:
-        # Draw goat - shifted right to be visible when door opens
-        draw.rectangle([0, 0, width, height], fill='#27AE60')  # Green background
-        # Goat body - moved right to be visible behind opened door
-        draw.ellipse([80, 120, 160, 180], fill='#95A5A6')
-        draw.ellipse([140, 90, 170, 120], fill='#95A5A6')  # Head
-        # Legs
-        draw.rectangle([90, 170, 105, 220], fill='#95A5A6')
-        draw.rectangle([135, 170, 150, 220], fill='#95A5A6')
-        draw.text((140, 280), "GOAT", fill='white', anchor="ms")
-    
-    # Then draw the door (if closed or partially open)
-    if state == 'closed' or opening:
-        if opening:
-            # Draw only the left frame when door is open
-            draw.rectangle([15, 15, 25, 285], fill='#654321', outline='#463217', width=2)
-            
-            # Draw partially open door - opening to the left
-            door_width = int(180 * 0.3)  # Door is 30% visible (70% open)
-            door_color = '#27AE60' if selected else '#8B4513'
-            
-            # Draw the door on the left side
-            # Create perspective effect by making door appear to open left
-            points = [
-                (20, 20),  # Top-left
-                (20 + door_width, 35),  # Top-right
-                (20 + door_width, 265),  # Bottom-right
-                (20, 280)  # Bottom-left
-            ]
-            draw.polygon(points, fill=door_color, outline='#654321')
-            
-            # Door handle - adjusted for perspective
-            handle_x = door_width - 15
-            draw.ellipse([handle_x - 10, 140, handle_x + 10, 160], fill='#FFD700')
-            
-            # Add shadow effect
-            shadow_points = [
-                (20 + door_width, 35),
-                (20 + door_width + 10, 40),
-                (20 + door_width + 10, 260),
-                (20 + door_width, 265)
-            ]
-            draw.polygon(shadow_points, fill='#463217')
-        else:
-            # Draw full frame and closed door
-            draw.rectangle([15, 15, 185, 285], fill='#654321', outline='#463217', width=3)
-            door_color = '#27AE60' if selected else '#8B4513'
-            draw.rectangle([20, 20, 180, 280], fill=door_color, outline='#654321', width=2)
-            draw.rectangle([35, 35, 165, 135], fill=door_color, outline='#654321', width=2)
-            draw.rectangle([35, 165, 165, 265], fill=door_color, outline='#654321', width=2)
-            draw.ellipse([150, 140, 170, 160], fill='#FFD700')  # Handle
-            draw.text((100, 280), f"Door {door_num + 1}", fill='white', anchor="ms")
-    
-    return img
+import uuid
+import numpy as np
+from simulation import iter_outcomes, simulate_until, wilson_interval
+from results_cache import ResultsCache
+import charts
+import exact_analysis
+import tournament
+from stats_store import StatsStore
+from game_log import GameLog
+from game_engine import analytic_win_probability, reveal_goats, switch_door
+from game_state import GameState
+from randomness import ALGORITHMS, DoorSampler, make_generator, parse_seed
+import asset_pipeline
+from profiling import PROFILER
+from sprites import MAX_DRAWN_DOORS, get_door_animation, get_door_sprite, get_image_base64
+
+@st.cache_resource
+def get_stats_store():
+    """Process-wide persistent statistics, shared by every session"""
+    return StatsStore(os.environ.get('MONTY_HALL_STATS_DB', 'monty_hall_stats.db'))
+
+@st.cache_resource
+def get_results_cache():
+    """Process-wide simulation results, optionally precomputed at startup"""
+    cache = ResultsCache()
+    if os.environ.get('MONTY_HALL_PRECOMPUTE'):
+        cache.precompute()
+    return cache
+
+@st.cache_resource
+def get_game_log():
+    """Process-wide audit log of every game played in the app"""
+    return GameLog(os.environ.get('MONTY_HALL_GAME_LOG', 'game_log'))
+
+def door_image(door_num, state='closed', selected=False, opening=False):
+    """Hashed static URL for a door variant, or its PNG bytes without static serving"""
+    if st.get_option('server.enableStaticServing'):
+        url = asset_pipeline.asset_url(asset_pipeline.sprite_key(door_num, state, selected, opening))
+        if url is not None:
+            return url
+    return get_door_sprite(door_num, state, selected, opening)
+
+def door_animation(is_selected, content):
+    """Hashed static URL for a door-opening animation, or its GIF bytes"""
+    if st.get_option('server.enableStaticServing'):
+        url = asset_pipeline.asset_url(asset_pipeline.animation_key(is_selected, content))
+        if url is not None:
+            return url
+    return get_door_animation(is_selected, content)
+
+def init_session_state():
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'game' not in st.session_state:
+        st.session_state.game = GameState()
+
+def analysis_rng():
+    """Generator for draws outside the game, so they never move the game's stream"""
+    game = st.session_state.game
+    config = (game.rng.seed, game.rng.algorithm)
+    if st.session_state.get('analysis_config') != config:
+        st.session_state.analysis_config = config
+        # A child of the session seed: reproducible, but its own stream
+        st.session_state.analysis_rng = make_generator(
+            np.random.SeedSequence(game.rng.seed, spawn_key=(1,)), game.rng.algorithm)
+    return st.session_state.analysis_rng
 
 def reset_game():
-    st.session_state.car_position = random.randint(0, 2)
-    st.session_state.chosen_door = None
-    st.session_state.revealed_door = None
-    st.session_state.game_state = 'choosing'
+    st.session_state.game.new_game()
 
 def reveal_goat():
-    """Reveal a goat behind one of the non-chosen doors"""
-    possible_reveals = []
-    
-    # Find doors that can be revealed (not chosen and has a goat)
-    for i in range(3):
-        if i != st.session_state.chosen_door and i != st.session_state.car_position:
-            possible_reveals.append(i)
-    
-    # If we have multiple options, randomly choose one
-    st.session_state.revealed_door = random.choice(possible_reveals)
-    st.session_state.game_state = 'deciding'
+    """Reveal goats behind n_reveals of the non-chosen doors"""
+    game = st.session_state.game
+    game.reveal = reveal_goats(game.n_doors, game.chosen_door, game.car_position, game.n_reveals,
+                               game.rng)
+    game.phase = 'deciding'
+
+def choose_door(door, strategy):
+    """Handle the first pick, including the automatic strategies"""
+    st.session_state.game.chosen_door = door
+    reveal_goat()
+
+    if strategy == 'Always stay':
+        process_choice(door, False)  # Stay with initial choice
+    elif strategy == 'Always switch':
+        # Switch to one of the remaining unopened doors
+        process_choice(switch_door(st.session_state.game.reveal, st.session_state.game.rng), True)
 
 def process_choice(final_choice, is_switch):
     """Process the player's final choice and update statistics"""
+    game = st.session_state.game
     # Update the chosen door to the final choice
-    st.session_state.chosen_door = final_choice
+    game.chosen_door = final_choice
     
-    if is_switch:
-        # Player switched
-        st.session_state.stats_switch['games'] += 1
-        if final_choice == st.session_state.car_position:
-            st.session_state.stats_switch['wins'] += 1
-    else:
-        # Player stayed
-        st.session_state.stats_stay['games'] += 1
-        if final_choice == st.session_state.car_position:
-            st.session_state.stats_stay['wins'] += 1
+    won = final_choice == game.car_position
+    strategy = 'switch' if is_switch else 'stay'
+    game.record(strategy, won)
+    get_stats_store().record(st.session_state.session_id, game.n_doors, game.n_reveals,
+                             strategy, won)
+    # Only the lowest opened door is logged, the analysis says so for K > 1
+    get_game_log().append(game.n_doors, game.n_reveals, game.car_position, game.reveal.chosen,
+                          game.reveal.first_open(), final_choice, strategy)
     
-    st.session_state.game_state = 'finished'
+    game.phase = 'finished'
 
-def create_monty_hall(position=None):
-    """Create Monty Hall host character"""
-    width, height = 100, 200
-    img = Image.new('RGB', (width, height), '#34495E')
-    draw = ImageDraw.Draw(img)
-    
-    # Body
-    draw.ellipse([30, 60, 70, 100], fill='#2E4053')  # Head
-    draw.rectangle([45, 100, 55, 150], fill='#E74C3C')  # Body
-    
-    # Bow tie
-    draw.polygon([(40, 110), (60, 110), (50, 115)], fill='#F1C40F')
-    
-    # Arms - position them based on whether he's pointing
-    if position is not None:
-        # Pointing arm
-        if position == 0:
-            draw.line([50, 120, 20, 140], fill='#E74C3C', width=5)
-        elif position == 1:
-            draw.line([50, 120, 50, 140], fill='#E74C3C', width=5)
+def interval_text(wins, games, confidence=0.95):
+    """' · 95% CI a–b%' for a win count, empty before any games"""
+    if games == 0:
+        return ""
+    low, high = wilson_interval(wins, games, confidence)
+    return f" · {confidence:.0%} CI {low * 100:.2f}–{high * 100:.2f}%"
+
+def add_results(results):
+    """Add batch simulation win counts to the session statistics"""
+    game = st.session_state.game
+    for strategy_name in ('stay', 'switch'):
+        game.add(strategy_name, results[strategy_name]['wins'], results[strategy_name]['games'])
+        get_stats_store().record_many(st.session_state.session_id, game.n_doors, game.n_reveals,
+                                      strategy_name, results[strategy_name]['wins'],
+                                      results[strategy_name]['games'])
+
+def stream_simulation(n_games, n_doors, n_reveals, seed=None, min_interval=0.05):
+    """Run a simulation chunk by chunk, updating a convergence chart in place"""
+    # Clicking Stop reruns the script, which interrupts the loop below;
+    # chunks finished so far are already in the session statistics
+    st.button("Stop")
+    progress = st.progress(0.0, text="Simulating...")
+    chart = st.empty()
+
+    # Running win rate after every game, downsampled to a fixed point budget
+    stay_series, switch_series = charts.ConvergenceSeries(), charts.ConvergenceSeries()
+    fig = session_figure('convergence')
+    last_draw = 0.0
+    for stay, switch in iter_outcomes(n_games, n_doors, n_reveals, seed,
+                                      algorithm=st.session_state.game.rng.algorithm):
+        add_results({
+            'stay': {'wins': int(np.count_nonzero(stay)), 'games': len(stay)},
+            'switch': {'wins': int(np.count_nonzero(switch)), 'games': len(switch)},
+        })
+        stay_series.extend(stay)
+        switch_series.extend(switch)
+
+        games = stay_series.games
+        now = time.perf_counter()
+        if now - last_draw >= min_interval or games == n_games:
+            last_draw = now
+            progress.progress(games / n_games, text=f"Simulated {games:,} of {n_games:,} games")
+            charts.update_convergence(fig, stay_series, switch_series)
+            chart.plotly_chart(fig, use_container_width=True)
+
+def session_figure(name):
+    """This session's figure for a chart, created once from the shared template"""
+    figures = st.session_state.setdefault('figures', {})
+    if name not in figures:
+        figures[name] = charts.new_figure(name)
+    return figures[name]
+
+def show_exact_analysis():
+    """Exact win probabilities for a host policy and strategy, next to Monte Carlo"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        host = st.selectbox("Host", list(exact_analysis.HOST_POLICIES),
+                            help="'ignorant' may open the car; its 'given a goat' column is Monty Fall")
+    with col2:
+        strategy = st.selectbox("Player", list(exact_analysis.STRATEGIES), index=1)
+    with col3:
+        n_doors = st.number_input("Doors (host opens one)", min_value=3,
+                                  max_value=exact_analysis.MAX_ASYMMETRIC_DOORS, value=3)
+    n_games = st.number_input("Monte Carlo games", min_value=100,
+                              max_value=min(1_000_000, exact_analysis.MAX_SIMULATED_DOOR_GAMES // n_doors),
+                              value=10_000, step=1_000)
+
+    if st.button("Analyze"):
+        exact = exact_analysis.analyze(host, strategy, n_doors)
+        mc = exact_analysis.simulate_policy(host, strategy, n_doors, n_games, analysis_rng())
+        diff = exact_analysis.compare(exact['win'], mc['wins'], mc['games'])
+        st.write(f"Exact win probability: **{exact['win']}** ({float(exact['win']):.4%}), "
+                 f"given a goat was revealed: **{exact['win_given_goat']}** "
+                 f"({float(exact['win_given_goat']):.4%})")
+        st.write(f"Monte Carlo: {diff['estimate']:.4%} over {n_games:,} games, "
+                 f"off by {diff['error'] * 100:+.3f} points (z = {diff['z_score']:+.2f})")
+
+    # The session's own games use the standard host
+    game = st.session_state.game
+    if game.n_reveals == 1 and game.n_doors <= 10_000:
+        lines = []
+        for name in ('stay', 'switch'):
+            wins, games = game.counts(name)
+            if games:
+                exact = exact_analysis.analyze('standard', name, game.n_doors)['win']
+                diff = exact_analysis.compare(exact, wins, games)
+                lines.append(f"{name}: {diff['error'] * 100:+.3f} points (z = {diff['z_score']:+.2f})")
+        if lines:
+            st.caption("Your statistics vs. exact: " + ", ".join(lines))
+
+def show_tournament():
+    """Rank many strategies on one shared batch of 3-door games"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        n_games = st.number_input("Games per strategy", min_value=100,
+                                  max_value=100_000_000, value=100_000, step=10_000)
+    with col2:
+        p = st.slider("Random switch probability", 0.0, 1.0, 0.5, 0.05)
+    with col3:
+        door = st.selectbox("Door for the door-based strategies", [0, 1, 2],
+                            format_func=lambda d: f"Door {d + 1}")
+    strategies = tournament.default_strategies(p, door)
+    chosen = st.multiselect("Strategies", list(strategies), default=list(strategies))
+
+    if st.button("Run tournament") and chosen:
+        with PROFILER.stage('tournament'):
+            rows = tournament.run_tournament({name: strategies[name] for name in chosen},
+                                             int(n_games),
+                                             algorithm=st.session_state.game.rng.algorithm)
+        st.dataframe({
+            'rank': list(range(1, len(rows) + 1)),
+            'strategy': [row['strategy'] for row in rows],
+            'win rate %': [row['win_rate'] * 100 for row in rows],
+            '95% CI %': [f"{row['ci_low'] * 100:.2f}–{row['ci_high'] * 100:.2f}" for row in rows],
+            'wins': [row['wins'] for row in rows],
+        }, hide_index=True)
+        st.bar_chart({'strategy': [row['strategy'] for row in rows],
+                      'win rate': [row['win_rate'] for row in rows]},
+                     x='strategy', y='win rate', horizontal=True, sort='-win rate')
+
+def show_rng_settings():
+    """Pick this session's generator and seed, or replay a game from its key"""
+    game = st.session_state.game
+    st.caption(f"This session draws from {game.rng.algorithm.upper()} "
+               f"seeded with `{game.rng.seed:x}`.")
+    col1, col2 = st.columns(2)
+    with col1:
+        algorithm = st.selectbox("Generator", list(ALGORITHMS),
+                                 index=list(ALGORITHMS).index(game.rng.algorithm))
+    with col2:
+        seed_text = st.text_input("Session seed (hex, blank for random)", value="")
+    if st.button("Apply and start a new game"):
+        try:
+            seed = parse_seed(seed_text)
+        except ValueError as exc:
+            st.error(str(exc).capitalize())
         else:
-            draw.line([50, 120, 80, 140], fill='#E74C3C', width=5)
-    else:
-        # Normal arms
-        draw.line([50, 120, 30, 140], fill='#E74C3C', width=5)
-        draw.line([50, 120, 70, 140], fill='#E74C3C', width=5)
-    
-    return img
+            game.rng = DoorSampler(seed, algorithm)
+            reset_game()
+            st.rerun()
 
-def get_image_base64(img):
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return img_str
+    st.subheader("Replay a game")
+    key = st.text_input("Game key", value=game.game_key)
+    if st.button("Replay"):
+        try:
+            replay = GameState.from_key(key)
+        except ValueError as exc:
+            st.error(str(exc))
+            return
+        if replay.reveal is None:
+            st.write(f"{replay.n_doors:,} doors, the host opens {replay.n_reveals:,}: "
+                     f"car behind door **{replay.car_position + 1:,}**, no door picked yet")
+            return
+        reveal = replay.reveal
+        opened = reveal.open_doors()[:20] if reveal.lists_open else None
+        st.write(f"{replay.n_doors:,} doors, first pick door **{replay.first_pick + 1:,}**: "
+                 f"car behind door **{replay.car_position + 1:,}**; the host opens "
+                 + (", ".join(f"{d + 1:,}" for d in opened) if opened is not None
+                    else f"all but {len(reveal.doors):,} doors")
+                 + f"; a random switch lands on door **{switch_door(reveal, replay.rng) + 1:,}**")
 
-def create_clickable_image(img, key, disabled=False):
-    img_str = get_image_base64(img)
+def create_clickable_image(img, key, disabled=False, src=None):
+    # Prefer a cacheable asset URL, inline base64 only as a fallback
+    if src is None:
+        src = f"data:image/png;base64,{get_image_base64(img)}"
     
     # Create HTML for clickable image with improved styling
     html = f'''
@@ -184,7 +290,7 @@ def create_clickable_image(img, key, disabled=False):
                     value: true
                 }}, '*');
             }}">
-            <img src="data:image/png;base64,{img_str}" 
+            <img src="{src}" 
                  style="width: 100%; 
                         {'opacity: 0.5;' if disabled else ''};
                         border-radius: 10px;
@@ -196,50 +302,54 @@ def create_clickable_image(img, key, disabled=False):
     clicked = st.components.v1.html(html, height=320)
     return clicked
 
-def create_door_animation(is_selected=False, content=None, animation_progress=0):
-    """Create door with opening animation"""
-    width, height = 200, 300
-    img = Image.new('RGB', (width, height), '#34495E')
-    draw = ImageDraw.Draw(img)
-    
-    # Draw background (what's behind the door)
-    if content == "car":
-        # Draw car (enhanced version)
-        draw.rectangle([0, 0, width, height], fill='#2C3E50')
-        draw.rectangle([30, 120, 170, 180], fill='#E74C3C')
-        draw.polygon([(50, 120), (150, 120), (130, 80), (70, 80)], fill='#E74C3C')
-        draw.polygon([(75, 85), (125, 85), (115, 115), (85, 115)], fill='#85C1E9')
-        draw.ellipse([45, 160, 85, 200], fill='#2C3E50', outline='#95A5A6', width=3)
-        draw.ellipse([115, 160, 155, 200], fill='#2C3E50', outline='#95A5A6', width=3)
-        draw.ellipse([35, 140, 45, 150], fill='#F1C40F')
-    elif content == "goat":
-        # Draw goat (enhanced version)
-        draw.rectangle([0, 0, width, height], fill='#27AE60')
-        draw.ellipse([50, 120, 150, 190], fill='#95A5A6')
-        draw.ellipse([130, 80, 170, 120], fill='#95A5A6')
-        draw.line([150, 85, 160, 65], fill='#7F8C8D', width=3)
-        draw.line([160, 85, 170, 65], fill='#7F8C8D', width=3)
-        draw.rectangle([70, 180, 85, 240], fill='#95A5A6')
-        draw.rectangle([115, 180, 130, 240], fill='#95A5A6')
-        draw.ellipse([145, 90, 155, 100], fill='#2C3E50')
-        draw.rectangle([0, 240, width, height], fill='#27AE60')
-    
-    # Draw door with animation
-    if animation_progress < 1:
-        door_width = int(180 * (1 - animation_progress))
-        door_color = '#27AE60' if is_selected else '#8B4513'
-        
-        # Door frame
-        draw.rectangle([15, 15, 185, 285], fill='#654321', outline='#463217', width=3)
-        # Animated door
-        draw.rectangle([20, 20, 20 + door_width, 280], fill=door_color, outline='#654321', width=2)
-        if door_width > 100:  # Only draw handle if door is wide enough
-            draw.ellipse([door_width - 30, 140, door_width - 10, 160], fill='#FFD700')
-    
-    return img
+def show_profiling_panel():
+    """Optional sidebar with per-stage latency of this process"""
+    with st.sidebar.expander("Debug profiling"):
+        PROFILER.enabled = st.checkbox("Record stage timings", value=PROFILER.enabled,
+                                       help="Process-wide: applies to every session")
+        summary = PROFILER.summary()
+        if not summary:
+            st.caption("No timings recorded yet")
+            return
+        st.dataframe({
+            'stage': list(summary),
+            'count': [entry['count'] for entry in summary.values()],
+            'p50 ms': [entry['p50'] * 1000 for entry in summary.values()],
+            'p95 ms': [entry['p95'] * 1000 for entry in summary.values()],
+            'max ms': [entry['max'] * 1000 for entry in summary.values()],
+        }, hide_index=True)
+
+        stage = st.selectbox("Histogram", list(summary))
+        samples_ms = np.array(PROFILER.samples()[stage]) * 1000
+        counts, edges = np.histogram(samples_ms, bins=20)
+        st.bar_chart({'ms': [f"{edge:.2f}" for edge in edges[:-1]], 'runs': counts},
+                     x='ms', y='runs')
+
+        st.download_button("OpenMetrics", PROFILER.to_openmetrics(),
+                           file_name="monty_hall_metrics.txt")
+        st.download_button("JSON", PROFILER.to_json(), file_name="monty_hall_metrics.json")
+        if st.button("Reset timings"):
+            PROFILER.reset()
+
+def show_startup_timing():
+    """Sidebar panel with cold-start and lazy import timings"""
+    with st.sidebar.expander("Startup timing"):
+        if startup.first_run_seconds is not None:
+            since = "Process start" if startup.PROCESS_START_EXACT else "App import"
+            st.write(f"{since} to the end of the first script run: "
+                     f"{startup.first_run_seconds * 1000:.0f} ms")
+        st.write(f"This run so far: {(time.perf_counter() - run_started) * 1000:.0f} ms")
+        for name, seconds in startup.IMPORT_TIMINGS.items():
+            if seconds is None:
+                st.write(f"`import {name}`: already loaded by Streamlit, deferring it saves nothing")
+            else:
+                st.write(f"`import {name}`: {seconds * 1000:.0f} ms, deferred to first use")
+        st.caption("For a full breakdown: python -m benchmarks.importtime_report")
 
 def main():
     st.set_page_config(page_title="Monty Hall Simulator", layout="wide")
+    init_session_state()
+    game = st.session_state.game
     
     # Add custom CSS
     st.markdown("""
@@ -258,12 +368,29 @@ def main():
     """, unsafe_allow_html=True)
     
     st.title("🚪 Monty Hall Problem Simulator")
-    st.markdown("""
+
+    # Game variant
+    col1, col2 = st.columns(2)
+    with col1:
+        n_doors = st.number_input("Number of doors", min_value=3,
+                                  max_value=1_000_000, value=game.n_doors)
+    with col2:
+        n_reveals = st.number_input("Doors the host opens", min_value=1,
+                                    max_value=n_doors - 2,
+                                    value=min(game.n_reveals, n_doors - 2))
+    if (n_doors, n_reveals) != (game.n_doors, game.n_reveals):
+        # Statistics from another variant aren't comparable, start over
+        game.n_doors = n_doors
+        game.n_reveals = n_reveals
+        game.reset_stats()
+        reset_game()
+
+    st.markdown(f"""
     ### The Game Rules:
-    1. There are 3 doors, behind one is a car 🚗, behind the others are goats 🐐
+    1. There are {n_doors:,} doors, behind one is a car 🚗, behind the others are goats 🐐
     2. Pick a door
-    3. One of the other doors with a goat will be revealed
-    4. You can stay with your choice or switch to the remaining door
+    3. {n_reveals:,} of the other doors with a goat will be revealed
+    4. You can stay with your choice or switch to another closed door
     """)
 
     # Strategy selection
@@ -273,24 +400,26 @@ def main():
         horizontal=True
     )
 
-    # Display doors
-    cols = st.columns(3)
-    for i in range(3):
-        with cols[i]:
-            # Create door image based on state
-            if st.session_state.game_state == 'finished':
-                # Show all doors as open in final state
-                door_img = create_door_image(
-                    i, 
-                    state='car' if i == st.session_state.car_position else 'goat',
-                    selected=(i == st.session_state.chosen_door),
-                    opening=True  # Changed to True to show all doors open
-                )
-            elif st.session_state.game_state == 'deciding':
-                # Check if this is the revealed door
-                if i == st.session_state.revealed_door:
+    game_state = game.phase
+    reveal = game.reveal
+
+    if n_doors <= MAX_DRAWN_DOORS:
+        # Display doors
+        cols = st.columns(n_doors)
+        for i in range(n_doors):
+            with cols[i]:
+                # Create door image based on state
+                if game_state == 'finished':
+                    # Show all doors as open in final state
+                    door_img = door_image(
+                        i, 
+                        state='car' if i == game.car_position else 'goat',
+                        selected=(i == game.chosen_door),
+                        opening=True  # Changed to True to show all doors open
+                    )
+                elif game_state == 'deciding' and reveal.is_open(i):
                     # Show revealed goat door as opening
-                    door_img = create_door_image(
+                    door_img = door_image(
                         i, 
                         state='goat',
                         selected=False,
@@ -298,76 +427,139 @@ def main():
                     )
                 else:
                     # Show other doors as closed
-                    door_img = create_door_image(
+                    door_img = door_image(
                         i, 
                         state='closed',
-                        selected=(i == st.session_state.chosen_door),
+                        selected=(i == game.chosen_door),
                         opening=False
                     )
-            else:
-                # Initial state - all doors closed
-                door_img = create_door_image(
-                    i, 
-                    state='closed',
-                    selected=(i == st.session_state.chosen_door),
-                    opening=False
-                )
-            
-            # Door button
-            disabled = (st.session_state.game_state == 'finished' or 
-                      (st.session_state.game_state == 'deciding' and i == st.session_state.revealed_door))
-            
-            if st.button(f"Select Door {i+1}", key=f"door_{i}", disabled=disabled):
-                if st.session_state.game_state == 'choosing':
-                    st.session_state.chosen_door = i
-                    reveal_goat()
-                    
-                    # Handle automatic strategies
-                    if strategy != 'Choose manually':
-                        if strategy == 'Always stay':
-                            process_choice(i, False)  # Stay with initial choice
-                        else:  # Always switch
-                            # Find the remaining unopened door
-                            final_choice = [x for x in range(3) 
-                                          if x != i and x != st.session_state.revealed_door][0]
-                            process_choice(final_choice, True)  # Switch to the other door
-                    
-                    st.rerun()  # Force a rerun to show the door animation
-                elif st.session_state.game_state == 'deciding':
-                    is_switch = (i != st.session_state.chosen_door)
-                    process_choice(i, is_switch)
-                    st.rerun()  # Force a rerun to show all doors opening
-            
-            st.image(door_img)
+
+                # Door button
+                disabled = (game_state == 'finished' or 
+                          (game_state == 'deciding' and reveal.is_open(i)))
+
+                if st.button(f"Select Door {i+1}", key=f"door_{i}", disabled=disabled):
+                    if game_state == 'choosing':
+                        choose_door(i, strategy)
+                        st.rerun()  # Force a rerun to show the door animation
+                    elif game_state == 'deciding':
+                        is_switch = (i != game.chosen_door)
+                        process_choice(i, is_switch)
+                        st.rerun()  # Force a rerun to show all doors opening
+
+                # Play the opening once, the first time a door shows up open
+                is_open = game_state == 'finished' or (game_state == 'deciding' and reveal.is_open(i))
+                if is_open and game.mark_animated(i):
+                    door_img = door_animation(
+                        i == game.chosen_door,
+                        'car' if i == game.car_position else 'goat',
+                    )
+
+                with PROFILER.stage('st_image'):
+                    st.image(door_img)
+    else:
+        # Compact mode: too many doors to draw, pick them by number
+        if game_state == 'deciding':
+            closed = reveal.closed_doors()[:20] if not reveal.lists_open else None
+            st.write(f"Your door: **{game.chosen_door + 1:,}** · "
+                     f"open: **{reveal.n_open:,}** · "
+                     f"closed others: **{n_doors - 1 - reveal.n_open:,}**")
+            if closed is not None:
+                st.caption("Closed doors: " + ", ".join(f"{d + 1:,}" for d in closed)
+                           + (" …" if n_doors - 1 - reveal.n_open > len(closed) else ""))
+        door = st.number_input("Door number", min_value=1, max_value=n_doors, value=1,
+                               disabled=game_state == 'finished') - 1
+        col1, col2 = st.columns(2)
+        with col1:
+            if game_state == 'choosing':
+                if st.button("Select Door"):
+                    choose_door(door, strategy)
+                    st.rerun()
+            elif game_state == 'deciding':
+                if st.button("Stay"):
+                    process_choice(game.chosen_door, False)
+                    st.rerun()
+        with col2:
+            if game_state == 'deciding':
+                if st.button("Switch to a random closed door"):
+                    process_choice(switch_door(reveal, game.rng), True)
+                    st.rerun()
+                if st.button("Switch to the door number"):
+                    if reveal.is_open(door):
+                        st.error(f"Door {door + 1:,} is already open!")
+                    else:
+                        process_choice(door, door != game.chosen_door)
+                        st.rerun()
 
     # Game status
-    if st.session_state.game_state == 'choosing':
+    if game_state == 'choosing':
         st.info("Choose a door!")
-    elif st.session_state.game_state == 'deciding':
-        st.warning(f"Door {st.session_state.revealed_door + 1} has been opened showing a goat! Would you like to switch your choice?")
-    elif st.session_state.game_state == 'finished':
-        won = st.session_state.chosen_door == st.session_state.car_position
+    elif game_state == 'deciding':
+        if reveal.n_open == 1:
+            opened = reveal.open_doors()[0] + 1
+            st.warning(f"Door {opened:,} has been opened showing a goat! Would you like to switch your choice?")
+        else:
+            st.warning(f"{reveal.n_open:,} doors have been opened showing goats! Would you like to switch your choice?")
+    elif game_state == 'finished':
+        won = game.chosen_door == game.car_position
         result = "Won! 🎉" if won else "Lost! 😢"
-        car_door = st.session_state.car_position + 1
-        st.success(f"Game Over - You {result} The car was behind Door {car_door}!")
+        car_door = game.car_position + 1
+        st.success(f"Game Over - You {result} The car was behind Door {car_door:,}!")
+    st.caption(f"Game key: `{game.game_key}`")
 
     # Statistics
     st.header("Statistics")
+    analytic = analytic_win_probability(n_doors, n_reveals)
     col1, col2 = st.columns(2)
     
     with col1:
-        stay_games = st.session_state.stats_stay['games']
-        stay_wins = st.session_state.stats_stay['wins']
+        stay_wins, stay_games = game.counts('stay')
         stay_pct = (stay_wins / stay_games * 100) if stay_games > 0 else 0
         st.metric("Stay Strategy", f"{stay_pct:.1f}%", 
                  f"Wins: {stay_wins}/{stay_games}")
+        st.caption(f"Analytic: {analytic['stay'] * 100:.4g}%"
+                   + interval_text(stay_wins, stay_games))
 
     with col2:
-        switch_games = st.session_state.stats_switch['games']
-        switch_wins = st.session_state.stats_switch['wins']
+        switch_wins, switch_games = game.counts('switch')
         switch_pct = (switch_wins / switch_games * 100) if switch_games > 0 else 0
         st.metric("Switch Strategy", f"{switch_pct:.1f}%",
                  f"Wins: {switch_wins}/{switch_games}")
+        st.caption(f"Analytic: {analytic['switch'] * 100:.4g}%"
+                   + interval_text(switch_wins, switch_games))
+
+    recent = game.history()
+    if recent:
+        st.caption("Your last games: " + " ".join(
+            ("🔀" if switched else "✋") + ("🚗" if won else "🐐") for won, switched in recent[-20:]))
+
+    # This session's saved games in this variant, which outlive switching variants
+    saved = get_stats_store().session_totals(st.session_state.session_id, game.n_doors, game.n_reveals)
+    if saved:
+        st.caption("This session, all games in this variant: " + ", ".join(
+            f"{name} {totals['wins']:,}/{totals['games']:,}"
+            for name, totals in sorted(saved.items())))
+
+    # Everyone's games in this variant, from the shared statistics store
+    all_players = get_stats_store().global_totals(game.n_doors, game.n_reveals)
+    if all_players:
+        col1, col2 = st.columns(2)
+        for col, strategy_name, label in ((col1, 'stay', "Stay (all players)"),
+                                          (col2, 'switch', "Switch (all players)")):
+            totals = all_players.get(strategy_name, {'wins': 0, 'games': 0})
+            pct = (totals['wins'] / totals['games'] * 100) if totals['games'] > 0 else 0
+            with col:
+                st.metric(label, f"{pct:.1f}%", f"Wins: {totals['wins']:,}/{totals['games']:,}",
+                          delta_color="off")
+
+    with st.expander("Exact analysis of host variants"):
+        show_exact_analysis()
+
+    with st.expander("Strategy tournament"):
+        show_tournament()
+
+    with st.expander("Random numbers and replay"):
+        show_rng_settings()
 
     # Control buttons
     col1, col2 = st.columns(2)
@@ -377,38 +569,48 @@ def main():
             st.rerun()  # Add immediate rerun after reset
     
     with col2:
-        if st.button("Auto Simulate (100 games)"):
-            for _ in range(100):
-                # Setup game
-                car_pos = random.randint(0, 2)
-                first_choice = random.randint(0, 2)
-                
-                # Find possible goat doors to reveal
-                possible_reveals = [i for i in range(3) 
-                                  if i != first_choice and i != car_pos]
-                if not possible_reveals:
-                    possible_reveals = [i for i in range(3) 
-                                      if i != first_choice]
-                    if car_pos in possible_reveals:
-                        possible_reveals.remove(car_pos)
-                
-                revealed_door = random.choice(possible_reveals)
-                
-                # Simulate staying
-                st.session_state.stats_stay['games'] += 1
-                if first_choice == car_pos:
-                    st.session_state.stats_stay['wins'] += 1
-                
-                # Simulate switching
-                st.session_state.stats_switch['games'] += 1
-                # Switch to the door that's neither the first choice nor the revealed door
-                final_choice = [i for i in range(3) 
-                              if i != first_choice and i != revealed_door][0]
-                if final_choice == car_pos:
-                    st.session_state.stats_switch['wins'] += 1
+        n_games = st.number_input("Games to simulate", min_value=1,
+                                  max_value=100_000_000, value=100, step=100)
+        with st.expander("Simulation options"):
+            workers = st.number_input("Worker processes", min_value=1,
+                                      max_value=os.cpu_count() or 1, value=1)
+            seed_text = st.text_input("Seed (hex, blank for random)", value="")
+            stream = st.checkbox("Stream results while simulating")
+            adaptive = st.checkbox("Stop once the confidence target is reached",
+                                   help="The number of games above becomes the budget")
+            target_width = st.number_input("Target 95% CI width (percentage points)",
+                                           min_value=0.01, max_value=50.0, value=1.0,
+                                           disabled=not adaptive)
+        if st.button(f"Auto Simulate ({n_games:,} games)"):
+            try:
+                seed = parse_seed(seed_text)
+            except ValueError as exc:
+                st.error(str(exc).capitalize())
+            else:
+                with PROFILER.stage('simulate'):
+                    if adaptive:
+                        results = simulate_until(target_width / 100, int(n_games), n_doors,
+                                                 n_reveals, seed, algorithm=game.rng.algorithm)
+                        add_results(results)
+                        games = results['stay']['games']
+                        if results['converged']:
+                            st.success(f"Both intervals narrower than {target_width:g} points after {games:,} games")
+                        else:
+                            st.warning(f"Budget of {games:,} games used up before reaching {target_width:g} points")
+                        for strategy_name in ('stay', 'switch'):
+                            low, high = results['intervals'][strategy_name]
+                            st.write(f"{strategy_name.capitalize()}: {low * 100:.3f}–{high * 100:.3f}%")
+                    elif stream:
+                        stream_simulation(int(n_games), n_doors, n_reveals, seed)
+                    else:
+                        results = get_results_cache().simulate(int(n_games), n_doors=n_doors,
+                                                               n_reveals=n_reveals, seed=seed,
+                                                               workers=int(workers),
+                                                               algorithm=game.rng.algorithm)
+                        add_results(results)
 
     # Add sound effects (if browser supports it)
-    if st.session_state.game_state == 'finished':
+    if game.phase == 'finished':
         st.markdown("""
             <audio autoplay>
                 <source src="data:audio/wav;base64,{encoded_sound}" type="audio/wav">
@@ -416,57 +618,30 @@ def main():
         """, unsafe_allow_html=True)
 
     # Replace the line chart with a donut chart
-    if st.session_state.stats_stay['games'] > 0 or st.session_state.stats_switch['games'] > 0:
+    if game.stay_games > 0 or game.switch_games > 0:
         st.header("Overall Results")
         
         # Calculate total games and wins for both strategies
-        total_stay = st.session_state.stats_stay['games']
-        total_switch = st.session_state.stats_switch['games']
-        wins_stay = st.session_state.stats_stay['wins']
-        wins_switch = st.session_state.stats_switch['wins']
+        wins_stay, total_stay = game.counts('stay')
+        wins_switch, total_switch = game.counts('switch')
         
-        # Create donut chart data
-        fig = go.Figure()
-        fig.add_trace(go.Pie(
-            values=[wins_stay, total_stay - wins_stay, wins_switch, total_switch - wins_switch],
-            labels=['Stay Wins', 'Stay Losses', 'Switch Wins', 'Switch Losses'],
-            hole=0.6,
-            marker_colors=['#2ecc71', '#e74c3c', '#27ae60', '#c0392b']
-        ))
-        
-        # Calculate percentages for center text
-        stay_pct = (wins_stay / total_stay * 100) if total_stay > 0 else 0
-        switch_pct = (wins_switch / total_switch * 100) if total_switch > 0 else 0
-        
-        # Update layout with center text
-        fig.update_layout(
-            annotations=[
-                dict(
-                    text=f'Stay: {stay_pct:.1f}%<br>Switch: {switch_pct:.1f}%',
-                    x=0.5, y=0.5,
-                    font_size=20,
-                    showarrow=False
-                )
-            ],
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5
-            ),
-            height=500,
-            title={
-                'text': f"Total Games Played: {total_stay + total_switch}",
-                'y': 0.95,
-                'x': 0.5,
-                'xanchor': 'center',
-                'yanchor': 'top'
-            }
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        with PROFILER.stage('plotly_figure'):
+            # Plotly is only needed from here on; the figure is built once
+            # per session and only its data changes between reruns
+            fig = charts.update_donut(session_figure('donut'), wins_stay, total_stay,
+                                      wins_switch, total_switch)
+
+        with PROFILER.stage('plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
+    show_startup_timing()
+    show_profiling_panel()
+    startup.record_first_run()
+    if PROFILER.enabled:
+        PROFILER.record('rerun', time.perf_counter() - run_started)
+        # Picked up by a scraper, e.g. node_exporter's textfile collector
+        metrics_file = os.environ.get('MONTY_HALL_METRICS_FILE')
+        if metrics_file:
+            PROFILER.write_openmetrics(metrics_file)
@@ -0,0 +1,155 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _StageStats:
+    __slots__ = ('recent', 'bucket_counts', 'count', 'total')
+
+    def __init__(self, keep):
+        self.recent = collections.deque(maxlen=keep)
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+
+class Profiler:
+    """Per-stage latency histograms, close to free while disabled
+
+    A disabled profiler hands out one shared no-op context manager and its
+    decorators only check a flag, so instrumentation can stay in hot paths.
+    Cumulative histograms back the OpenMetrics export; the last `keep`
+    samples per stage back the percentiles.
+    """
+
+    def __init__(self, enabled=False, keep=1000):
+        self.enabled = enabled
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def stage(self, name):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of a function as a stage"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = _StageStats(self.keep)
+            stats.recent.append(seconds)
+            stats.count += 1
+            stats.total += seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    stats.bucket_counts[i] += 1
+                    break
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+    def samples(self):
+        """{stage: [recent durations in seconds]}"""
+        with self._lock:
+            return {name: list(stats.recent) for name, stats in self._stages.items()}
+
+    def summary(self):
+        """{stage: {count, mean, p50, p95, max}} in seconds, percentiles over recent samples"""
+        result = {}
+        with self._lock:
+            for name, stats in self._stages.items():
+                recent = sorted(stats.recent)
+                if not recent:
+                    continue
+                result[name] = {
+                    'count': stats.count,
+                    'mean': stats.total / stats.count,
+                    'p50': recent[len(recent) // 2],
+                    'p95': recent[min(len(recent) - 1, int(len(recent) * 0.95))],
+                    'max': recent[-1],
+                }
+        return result
+
+    def to_json(self):
+        return json.dumps({'stages': self.summary(), 'samples': self.samples()})
+
+    def to_openmetrics(self, metric='monty_hall_stage_seconds'):
+        """Cumulative histograms in OpenMetrics text format"""
+        lines = [f"# TYPE {metric} histogram",
+                 f"# UNIT {metric} seconds",
+                 f"# HELP {metric} Time spent per app stage."]
+        with self._lock:
+            for name, stats in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {stats.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {stats.total}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {stats.count}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path):
+        """Atomically write the export, e.g. for a node_exporter textfile collector"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_openmetrics())
+        os.replace(tmp_path, path)
+
+
+# Process-wide profiler shared by the app and the modules it instruments
+PROFILER = Profiler(enabled=bool(os.environ.get('MONTY_HALL_PROFILE')))
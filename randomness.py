@@ -0,0 +1,154 @@
+import numpy as np
+
+# Selectable bit generators, all producing 64-bit raw draws
+ALGORITHMS = {
+    'pcg64': np.random.PCG64,
+    'pcg64dxsm': np.random.PCG64DXSM,
+    'philox': np.random.Philox,
+    'sfc64': np.random.SFC64,
+}
+DEFAULT_ALGORITHM = 'pcg64'
+
+_RANGE = 1 << 64
+_EMPTY = np.empty(0, dtype=np.uint64)
+
+
+def check_algorithm(algorithm):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown RNG algorithm {algorithm!r}, "
+                         f"choose from {', '.join(ALGORITHMS)}")
+
+
+def make_generator(seed=None, algorithm=DEFAULT_ALGORITHM):
+    """numpy Generator for a seed (int or SeedSequence) and algorithm name"""
+    check_algorithm(algorithm)
+    return np.random.Generator(ALGORITHMS[algorithm](seed))
+
+
+def parse_seed(text):
+    """Seed from hex text, None when blank; ValueError unless it fits in 128 bits"""
+    if not text.strip():
+        return None
+    try:
+        seed = int(text, 16)
+    except ValueError:
+        seed = -1
+    if not 0 <= seed < 1 << 128:
+        raise ValueError(f"the seed must be a hex number of at most 32 digits, got {text!r}")
+    return seed
+
+
+def new_seed():
+    """Fresh 128-bit seed from OS entropy"""
+    return np.random.SeedSequence().entropy
+
+
+class DoorSampler:
+    """Scalar draws for the game engine, served from prefetched batches
+
+    Speaks the randrange/choice/random subset of random.Random, so it drops
+    in wherever the engine took `rng`, but each Python-level call only pops
+    a raw 64-bit value that was drawn `batch` at a time. integers() and
+    random(size) take numpy Generator's arguments, so array code can be
+    handed either.
+
+    `position` counts the raw values consumed. (algorithm, seed, position)
+    pins down every following draw, and key() packs it into a string from
+    which from_key() resumes the exact same stream.
+    """
+    __slots__ = ('algorithm', 'seed', 'batch', '_bit_generator', '_buffer', '_index', '_fetched')
+
+    def __init__(self, seed=None, algorithm=DEFAULT_ALGORITHM, position=0, batch=32):
+        check_algorithm(algorithm)
+        self.algorithm = algorithm
+        self.seed = new_seed() if seed is None else seed
+        self.batch = batch
+        self._bit_generator = ALGORITHMS[algorithm](self.seed)
+        # Filled on the first draw, so idle samplers hold no batch at all
+        self._buffer = _EMPTY
+        self._index = 0
+        self._fetched = 0
+        # Skip ahead by discarding, SFC64 has no advance()
+        while self._fetched < position:
+            size = min(position - self._fetched, 1 << 20)
+            self._bit_generator.random_raw(size)
+            self._fetched += size
+
+    @property
+    def position(self):
+        return self._fetched - len(self._buffer) + self._index
+
+    def key(self, position=None):
+        """'algorithm-seedhex-position', the position defaults to the current one"""
+        if position is None:
+            position = self.position
+        return f"{self.algorithm}-{self.seed:x}-{position}"
+
+    @classmethod
+    def from_key(cls, key):
+        try:
+            algorithm, seed, position = key.strip().split('-')
+            return cls(int(seed, 16), algorithm, int(position))
+        except ValueError:
+            raise ValueError(f"malformed game key {key!r}") from None
+
+    def __reduce__(self):
+        # Pickle as the stream position; the prefetched batch is redrawn on demand
+        return type(self), (self.seed, self.algorithm, self.position, self.batch)
+
+    def _refill(self):
+        self._buffer = self._bit_generator.random_raw(self.batch)
+        self._fetched += self.batch
+        self._index = 0
+
+    def _take(self, size):
+        """Next `size` raw values as an array, the buffer first"""
+        head = self._buffer[self._index:self._index + size]
+        self._index += len(head)
+        rest = size - len(head)
+        self._fetched += rest
+        return np.concatenate((head, self._bit_generator.random_raw(rest)))
+
+    def randrange(self, n):
+        """Uniform int in range(n), rejection keeps it unbiased for any n"""
+        limit = _RANGE - _RANGE % n
+        while True:
+            if self._index == len(self._buffer):
+                self._refill()
+            value = self._buffer.item(self._index)
+            self._index += 1
+            if value < limit:
+                return value % n
+
+    def random(self, size=None):
+        """Uniform float in [0, 1) with 53 random bits, or an array of `size` of them"""
+        if size is not None:
+            return (self._take(size) >> np.uint64(11)) * (1.0 / (1 << 53))
+        if self._index == len(self._buffer):
+            self._refill()
+        value = self._buffer.item(self._index)
+        self._index += 1
+        return (value >> 11) * (1.0 / (1 << 53))
+
+    def integers(self, low, high=None, size=None):
+        """Uniform ints in [low, high), or [0, low) alone, like numpy's Generator.integers"""
+        if high is None:
+            low, high = 0, low
+        n = high - low
+        if size is None:
+            return low + self.randrange(n)
+        raw = self._take(size)
+        values = (raw % np.uint64(n)).astype(np.int64)
+        if _RANGE % n:
+            limit = np.uint64(_RANGE - _RANGE % n)
+            # Vanishingly rare; redraw in order so the stream stays reproducible
+            for i in np.flatnonzero(raw >= limit):
+                values[i] = self.randrange(n)
+        return values + low
+
+    def choice(self, seq):
+        return seq[self.randrange(len(seq))]
+
+
+# Process-wide sampler for callers that don't pass their own
+SAMPLER = DoorSampler()
@@ -0,0 +1,149 @@
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from randomness import DEFAULT_ALGORITHM
+from simulation import simulate_games
+
+# Configurations worth simulating ahead of the first request as
+# (n_doors, n_reveals, n_games, seed). Seed None fills the unseeded pool,
+# which serves any game count.
+POPULAR = (
+    (3, 1, None, None),
+    (10, 8, None, None),
+)
+
+STRATEGIES = ('stay', 'switch')
+
+
+def _select(results, strategy):
+    if strategy == 'both':
+        return {name: dict(results[name]) for name in STRATEGIES}
+    return {strategy: dict(results[strategy])}
+
+
+class ResultsCache:
+    """Process-wide store of simulation results shared by every session
+
+    Seeded runs are deterministic, so they're kept in an LRU keyed by
+    (n_doors, n_reveals, strategy, n_games, seed, algorithm). Unseeded runs
+    can't be repeated, so instead each (n_doors, n_reveals, algorithm) gets a pool of
+    independently seeded `pool_chunk`-game results that are consumed once
+    and summed into larger totals; the pool refills in the background.
+    """
+
+    def __init__(self, max_entries=256, pool_chunk=1_000, pool_games=5_000_000, max_pools=8):
+        self.max_entries = max_entries
+        self.pool_chunk = pool_chunk
+        self.pool_games = pool_games
+        self.max_pools = max_pools
+        self.hits = self.misses = 0
+        self.served_from_pool = 0
+        self._lock = threading.Lock()
+        self._results = collections.OrderedDict()
+        self._pools = collections.OrderedDict()
+        self._refilling = set()
+        self._refiller = ThreadPoolExecutor(max_workers=1, thread_name_prefix='results-pool')
+
+    def simulate(self, n_games, n_doors=3, n_reveals=1, seed=None, strategy='both', workers=1,
+                 algorithm=DEFAULT_ALGORITHM):
+        """Drop-in for simulate_games, served from the cache or the pool when possible"""
+        if seed is None:
+            return _select(self._from_pool(n_games, n_doors, n_reveals, workers, algorithm),
+                           strategy)
+
+        key = (n_doors, n_reveals, strategy, n_games, seed, algorithm)
+        both_key = (n_doors, n_reveals, 'both', n_games, seed, algorithm)
+        with self._lock:
+            for candidate in (key, both_key):
+                results = self._results.get(candidate)
+                if results is not None:
+                    self._results.move_to_end(candidate)
+                    self.hits += 1
+                    return _select(results, strategy)
+            self.misses += 1
+
+        results = simulate_games(n_games, n_doors=n_doors, n_reveals=n_reveals,
+                                 seed=seed, workers=workers, algorithm=algorithm)
+        with self._lock:
+            self._results[key] = _select(results, strategy)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return _select(results, strategy)
+
+    def _from_pool(self, n_games, n_doors, n_reveals, workers, algorithm):
+        config = (n_doors, n_reveals, algorithm)
+        wanted = n_games // self.pool_chunk
+        with self._lock:
+            pool = self._pool_locked(config)
+            taken = [pool.popleft() for _ in range(min(wanted, len(pool)))]
+            self.served_from_pool += len(taken) * self.pool_chunk
+
+        results = {name: {'wins': 0, 'games': n_games} for name in STRATEGIES}
+        for chunk in taken:
+            for name in STRATEGIES:
+                results[name]['wins'] += chunk[name]
+        rest = n_games - len(taken) * self.pool_chunk
+        if rest:
+            fresh = simulate_games(rest, n_doors=n_doors, n_reveals=n_reveals, workers=workers,
+                                   algorithm=algorithm)
+            for name in STRATEGIES:
+                results[name]['wins'] += fresh[name]['wins']
+        self._schedule_refill(config)
+        return results
+
+    def _pool_locked(self, config):
+        pool = self._pools.get(config)
+        if pool is None:
+            pool = self._pools[config] = collections.deque()
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        self._pools.move_to_end(config)
+        return pool
+
+    def _schedule_refill(self, config):
+        with self._lock:
+            self._pool_locked(config)
+            if config in self._refilling:
+                return
+            self._refilling.add(config)
+        self._refiller.submit(self.fill_pool, *config)
+
+    def fill_pool(self, n_doors=3, n_reveals=1, algorithm=DEFAULT_ALGORITHM):
+        """Top the pool for a configuration back up to `pool_games` games"""
+        config = (n_doors, n_reveals, algorithm)
+        try:
+            while True:
+                with self._lock:
+                    pool = self._pools.get(config)
+                    # Stop if the pool was evicted meanwhile
+                    if pool is None or len(pool) * self.pool_chunk >= self.pool_games:
+                        return
+                # Every chunk draws fresh OS entropy, so chunks are independent
+                results = simulate_games(self.pool_chunk, n_doors=n_doors, n_reveals=n_reveals,
+                                         algorithm=algorithm)
+                with self._lock:
+                    pool.append({name: results[name]['wins'] for name in STRATEGIES})
+        finally:
+            with self._lock:
+                self._refilling.discard(config)
+
+    def precompute(self, configs=POPULAR):
+        """Fill the LRU for seeded configurations and the pools for unseeded ones"""
+        for n_doors, n_reveals, n_games, seed in configs:
+            if seed is None:
+                self._schedule_refill((n_doors, n_reveals, DEFAULT_ALGORITHM))
+            else:
+                self.simulate(n_games, n_doors, n_reveals, seed)
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._results),
+                'served_from_pool': self.served_from_pool,
+                'pool_games': {f"{n_doors}/{n_reveals}/{algorithm}": len(pool) * self.pool_chunk
+                               for (n_doors, n_reveals, algorithm), pool in self._pools.items()},
+            }
@@ -0,0 +1,210 @@
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from game_engine import check_config
+from randomness import DEFAULT_ALGORITHM, check_algorithm, make_generator
+
+# Largest number of games drawn at once, keeps memory bounded for huge runs
+CHUNK_SIZE = 1_000_000
+
+
+def _door_dtype(n_doors):
+    return np.int8 if n_doors <= 127 else np.int64
+
+
+def draw_classic_games(n_games, rng):
+    """Car positions, first choices and host reveals for n_games 3-door games"""
+    car_pos = rng.integers(0, 3, size=n_games, dtype=np.int8)
+    first_choice = rng.integers(0, 3, size=n_games, dtype=np.int8)
+
+    # Host opens the only goat door left, or either other door when
+    # the first choice already hides the car
+    coin = rng.integers(1, 3, size=n_games, dtype=np.int8)
+    revealed_door = np.where(first_choice == car_pos,
+                             (first_choice + coin) % 3,
+                             3 - first_choice - car_pos)
+    return car_pos, first_choice, revealed_door
+
+
+def _play_classic(n_games, rng):
+    """3-door game with the host reveal drawn explicitly"""
+    car_pos, first_choice, revealed_door = draw_classic_games(n_games, rng)
+
+    # Switch to the door that's neither the first choice nor the revealed door
+    final_choice = 3 - first_choice - revealed_door
+    return first_choice == car_pos, final_choice == car_pos
+
+
+def play_chunk(n_games, rng, n_doors=3, n_reveals=1):
+    """Play n_games in one vectorized pass and return (stay, switch) win masks"""
+    if n_doors == 3:
+        return _play_classic(n_games, rng)
+
+    dtype = _door_dtype(n_doors)
+    car_pos = rng.integers(0, n_doors, size=n_games, dtype=dtype)
+    first_choice = rng.integers(0, n_doors, size=n_games, dtype=dtype)
+    stay = first_choice == car_pos
+
+    # After K goat reveals the car is one of the n_doors - 1 - K closed doors
+    # the player can switch to (unless it's behind the first choice). Which
+    # goats the host opened doesn't matter, so the reveal and the switch
+    # target collapse to a single O(1) draw: the switch lands on the car
+    # when it picks slot 0 of the remaining closed doors.
+    n_closed = n_doors - 1 - n_reveals
+    if n_closed == 1:
+        switch = ~stay
+    else:
+        switch = ~stay & (rng.integers(0, n_closed, size=n_games) == 0)
+    return stay, switch
+
+
+def simulate_chunk(n_games, rng, n_doors=3, n_reveals=1):
+    """Play n_games in one vectorized pass and return (stay_wins, switch_wins)"""
+    stay, switch = play_chunk(n_games, rng, n_doors, n_reveals)
+    return int(np.count_nonzero(stay)), int(np.count_nonzero(switch))
+
+
+def _chunk_sizes(n_games):
+    """Fixed chunk layout, so results never depend on how chunks are scheduled"""
+    full, rest = divmod(n_games, CHUNK_SIZE)
+    return [CHUNK_SIZE] * full + ([rest] if rest else [])
+
+
+def _run_chunk(args):
+    size, seed_seq, n_doors, n_reveals, algorithm = args
+    return simulate_chunk(size, make_generator(seed_seq, algorithm), n_doors, n_reveals)
+
+
+# One pool per process, replaced when a run asks for another worker count
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _map_in_pool(workers, tasks):
+    """Submit every task to the shared pool and return the results iterator"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                # Runs already submitted to the old pool still finish
+                _pool.shutdown(wait=False)
+            # Spawned rather than forked: the Streamlit server is multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        # map() submits everything right away, so the pool can't be swapped
+        # out from under these tasks once the lock is released
+        return _pool.map(_run_chunk, tasks)
+
+
+def simulate_games(n_games, n_doors=3, n_reveals=1, seed=None, workers=1,
+                   algorithm=DEFAULT_ALGORITHM):
+    """Simulate n_games with both strategies and return the win counts
+
+    The run is split into CHUNK_SIZE chunks, each with its own child of the
+    master SeedSequence, so a given seed gives bit-identical counts for any
+    number of workers.
+    """
+    check_config(n_doors, n_reveals)
+    check_algorithm(algorithm)
+    if n_games < 0:
+        raise ValueError(f"number of games can't be negative, got {n_games}")
+    if workers < 1:
+        raise ValueError(f"need at least 1 worker, got {workers}")
+    sizes = _chunk_sizes(n_games)
+    children = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(size, child, n_doors, n_reveals, algorithm) for size, child in zip(sizes, children)]
+
+    if workers > 1 and len(tasks) > 1:
+        partials = _map_in_pool(workers, tasks)
+    else:
+        partials = map(_run_chunk, tasks)
+
+    results = {
+        'stay': {'wins': 0, 'games': n_games},
+        'switch': {'wins': 0, 'games': n_games},
+    }
+    for stay_wins, switch_wins in partials:
+        results['stay']['wins'] += stay_wins
+        results['switch']['wins'] += switch_wins
+    return results
+
+
+def iter_outcomes(n_games, n_doors=3, n_reveals=1, seed=None, first_chunk=1_000,
+                  algorithm=DEFAULT_ALGORITHM):
+    """Yield (stay, switch) per-game win masks chunk by chunk
+
+    Chunks start small and double up to CHUNK_SIZE, so the first estimates
+    arrive within milliseconds even for very long runs.
+    """
+    check_config(n_doors, n_reveals)
+    seed_seq = np.random.SeedSequence(seed)
+    size = first_chunk
+    remaining = n_games
+    while remaining > 0:
+        size = min(size, remaining)
+        rng = make_generator(seed_seq.spawn(1)[0], algorithm)
+        yield play_chunk(size, rng, n_doors, n_reveals)
+        remaining -= size
+        size = min(size * 2, CHUNK_SIZE)
+
+
+def wilson_interval(wins, games, confidence=0.95):
+    """Wilson score interval for a win rate, (0, 1) before any games"""
+    if games == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = wins / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def simulate_until(max_width, budget, n_doors=3, n_reveals=1, seed=None,
+                   confidence=0.95, first_chunk=1_000, algorithm=DEFAULT_ALGORITHM):
+    """Simulate until both win-rate intervals are narrower than max_width
+
+    Each batch is sized from the current estimates to roughly the number of
+    games still needed, so the run rarely overshoots the target. Stops at
+    `budget` games regardless.
+    """
+    check_config(n_doors, n_reveals)
+    seed_seq = np.random.SeedSequence(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    results = {
+        'stay': {'wins': 0, 'games': 0},
+        'switch': {'wins': 0, 'games': 0},
+    }
+    games = 0
+    size = first_chunk
+    while games < budget:
+        size = max(1, min(size, budget - games, CHUNK_SIZE))
+        rng = make_generator(seed_seq.spawn(1)[0], algorithm)
+        stay_wins, switch_wins = simulate_chunk(size, rng, n_doors, n_reveals)
+        games += size
+        for strategy, wins in (('stay', stay_wins), ('switch', switch_wins)):
+            results[strategy]['wins'] += wins
+            results[strategy]['games'] = games
+
+        intervals = {strategy: wilson_interval(counts['wins'], games, confidence)
+                     for strategy, counts in results.items()}
+        if all(high - low <= max_width for low, high in intervals.values()):
+            break
+
+        # Games needed for a normal-approximation interval of max_width
+        needed = max(4 * z * z * p * (1 - p) / (max_width * max_width)
+                     for p in (counts['wins'] / games for counts in results.values()))
+        size = max(first_chunk, int(needed) - games)
+
+    results['intervals'] = {strategy: wilson_interval(counts['wins'], counts['games'], confidence)
+                            for strategy, counts in results.items()}
+    results['converged'] = all(high - low <= max_width
+                               for low, high in results['intervals'].values())
+    return results
@@ -0,0 +1,172 @@
+import base64
+import functools
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from profiling import PROFILER
+
+# Above this many doors the game is shown in compact mode instead of as images
+MAX_DRAWN_DOORS = 10
+
+# How far a revealed door stands open; the opening animation ends here too
+ANIMATION_END = 0.7
+
+def _draw_contents(draw, state, opening, width=200, height=300):
+    """What's behind the door"""
+    if state == 'car':
+        # Draw car
+        draw.rectangle([0, 0, width, height], fill='#2C3E50')  # Background
+        # Car body
+        draw.rectangle([40, 120, 160, 170], fill='#E74C3C')
+        draw.polygon([(60, 120), (140, 120), (130, 80), (70, 80)], fill='#E74C3C')
+        # Windows
+        draw.polygon([(75, 85), (125, 85), (115, 115), (85, 115)], fill='#85C1E9')
+        # Wheels
+        draw.ellipse([50, 150, 80, 180], fill='#2C3E50', outline='white', width=2)
+        draw.ellipse([120, 150, 150, 180], fill='#2C3E50', outline='white', width=2)
+        draw.text((100, 280), "CAR!", fill='white', anchor="ms")
+    elif state == 'goat' or opening:
+        # Draw goat - shifted right to be visible when door opens
+        draw.rectangle([0, 0, width, height], fill='#27AE60')  # Green background
+        # Goat body - moved right to be visible behind opened door
+        draw.ellipse([80, 120, 160, 180], fill='#95A5A6')
+        draw.ellipse([140, 90, 170, 120], fill='#95A5A6')  # Head
+        # Legs
+        draw.rectangle([90, 170, 105, 220], fill='#95A5A6')
+        draw.rectangle([135, 170, 150, 220], fill='#95A5A6')
+        draw.text((140, 280), "GOAT", fill='white', anchor="ms")
+
+def _draw_closed_door(draw, selected):
+    # Draw full frame and closed door
+    draw.rectangle([15, 15, 185, 285], fill='#654321', outline='#463217', width=3)
+    door_color = '#27AE60' if selected else '#8B4513'
+    draw.rectangle([20, 20, 180, 280], fill=door_color, outline='#654321', width=2)
+    draw.rectangle([35, 35, 165, 135], fill=door_color, outline='#654321', width=2)
+    draw.rectangle([35, 165, 165, 265], fill=door_color, outline='#654321', width=2)
+    draw.ellipse([150, 140, 170, 160], fill='#FFD700')  # Handle
+
+def _draw_open_door(draw, selected, open_fraction=ANIMATION_END):
+    """Door swung `open_fraction` of its width to the left, contents showing beside it"""
+    # Only the left post of the frame, so nothing covers the doorway
+    draw.rectangle([15, 15, 25, 285], fill='#654321', outline='#463217', width=2)
+
+    door_width = int(160 * (1 - open_fraction))
+    # Perspective grows as the door turns, up to 15px at the fully open pose
+    skew = round(15 * open_fraction / ANIMATION_END)
+    door_color = '#27AE60' if selected else '#8B4513'
+    points = [
+        (20, 20),  # Top-left
+        (20 + door_width, 20 + skew),  # Top-right
+        (20 + door_width, 280 - skew),  # Bottom-right
+        (20, 280)  # Bottom-left
+    ]
+    draw.polygon(points, fill=door_color, outline='#654321')
+
+    # Door handle, 20px in from the door's free edge
+    draw.ellipse([door_width - 10, 140, door_width + 10, 160], fill='#FFD700')
+
+    # Shadow along the free edge
+    shade = round(10 * open_fraction / ANIMATION_END)
+    if shade:
+        shadow_points = [
+            (20 + door_width, 20 + skew),
+            (20 + door_width + shade, 20 + skew + shade // 2),
+            (20 + door_width + shade, 280 - skew - shade // 2),
+            (20 + door_width, 280 - skew)
+        ]
+        draw.polygon(shadow_points, fill='#463217')
+
+@PROFILER.timed('create_door_image')
+def create_door_image(door_num, state='closed', selected=False, opening=False):
+    width, height = 200, 300
+    img = Image.new('RGB', (width, height), '#34495E')
+    draw = ImageDraw.Draw(img)
+    
+    # First draw what's behind the door
+    _draw_contents(draw, state, opening, width, height)
+    
+    # Then draw the door (if closed or open)
+    if opening:
+        _draw_open_door(draw, selected)
+    elif state == 'closed':
+        _draw_closed_door(draw, selected)
+        draw.text((100, 280), f"Door {door_num + 1}", fill='white', anchor="ms")
+    
+    return img
+
+@functools.lru_cache(maxsize=None)
+def get_door_sprite(door_num, state='closed', selected=False, opening=False):
+    """Render a door variant once per process and return its PNG bytes"""
+    img = create_door_image(door_num, state, selected, opening)
+    buffered = BytesIO()
+    with PROFILER.stage('encode_png'):
+        img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+def create_monty_hall(position=None):
+    """Create Monty Hall host character"""
+    width, height = 100, 200
+    img = Image.new('RGB', (width, height), '#34495E')
+    draw = ImageDraw.Draw(img)
+    
+    # Body
+    draw.ellipse([30, 60, 70, 100], fill='#2E4053')  # Head
+    draw.rectangle([45, 100, 55, 150], fill='#E74C3C')  # Body
+    
+    # Bow tie
+    draw.polygon([(40, 110), (60, 110), (50, 115)], fill='#F1C40F')
+    
+    # Arms - position them based on whether he's pointing
+    if position is not None:
+        # Pointing arm
+        if position == 0:
+            draw.line([50, 120, 20, 140], fill='#E74C3C', width=5)
+        elif position == 1:
+            draw.line([50, 120, 50, 140], fill='#E74C3C', width=5)
+        else:
+            draw.line([50, 120, 80, 140], fill='#E74C3C', width=5)
+    else:
+        # Normal arms
+        draw.line([50, 120, 30, 140], fill='#E74C3C', width=5)
+        draw.line([50, 120, 70, 140], fill='#E74C3C', width=5)
+    
+    return img
+
+@PROFILER.timed('get_image_base64')
+def get_image_base64(img):
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    img_str = base64.b64encode(buffered.getvalue()).decode()
+    return img_str
+
+@PROFILER.timed('create_door_animation')
+def create_door_animation(is_selected=False, content=None, animation_progress=0):
+    """Door `animation_progress` of the way open, drawn like create_door_image"""
+    width, height = 200, 300
+    img = Image.new('RGB', (width, height), '#34495E')
+    draw = ImageDraw.Draw(img)
+    _draw_contents(draw, content, True, width, height)
+    if animation_progress <= 0:
+        _draw_closed_door(draw, is_selected)
+    else:
+        _draw_open_door(draw, is_selected, animation_progress)
+    return img
+
+def door_animation_frames(is_selected, content, frames=12):
+    """Frames of the door opening from closed to ANIMATION_END
+
+    The last frame is the static open sprite, create_door_image(..., opening=True).
+    """
+    return [create_door_animation(is_selected, content, ANIMATION_END * i / (frames - 1))
+            for i in range(frames)]
+
+@functools.lru_cache(maxsize=None)
+def get_door_animation(is_selected, content, frames=12, frame_ms=40):
+    """Render the door-opening sequence once per process as animated GIF bytes"""
+    images = door_animation_frames(is_selected, content, frames)
+    buffered = BytesIO()
+    # No loop count, so browsers play the opening once and hold the last frame
+    images[0].save(buffered, format="GIF", save_all=True,
+                   append_images=images[1:], duration=frame_ms)
+    return buffered.getvalue()
@@ -0,0 +1,52 @@
+import importlib
+import os
+import sys
+import time
+
+
+def _process_age():
+    """Seconds since this process started, from /proc; None where that isn't available"""
+    try:
+        with open('/proc/self/stat') as f:
+            stat = f.read()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except OSError:
+        return None
+    # The command name may hold spaces or parentheses, fields resume after the last ')'.
+    # starttime is field 22: clock ticks after boot.
+    start_ticks = int(stat[stat.rindex(')') + 2:].split()[19])
+    return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+
+
+# Real process start on the perf_counter clock. Under `streamlit run` this
+# module is first imported well after the interpreter and server started,
+# so import time is only the fallback.
+_age = _process_age()
+PROCESS_START_EXACT = _age is not None
+PROCESS_STARTED = time.perf_counter() - (_age or 0.0)
+
+# module name -> seconds its import took on first use, or None when it was
+# already imported by someone else and deferring it saved nothing
+IMPORT_TIMINGS = {}
+
+# Seconds from process start to the end of the first script run
+first_run_seconds = None
+
+
+def lazy_import(name):
+    """Import a module on first use and remember how long that took"""
+    module = sys.modules.get(name)
+    if module is not None:
+        IMPORT_TIMINGS.setdefault(name, None)
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMINGS[name] = time.perf_counter() - start
+    return module
+
+
+def record_first_run():
+    global first_run_seconds
+    if first_run_seconds is None:
+        first_run_seconds = time.perf_counter() - PROCESS_STARTED
@@ -0,0 +1,156 @@
+import atexit
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_totals (
+    session_id TEXT NOT NULL,
+    n_doors INTEGER NOT NULL,
+    n_reveals INTEGER NOT NULL,
+    strategy TEXT NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, n_doors, n_reveals, strategy)
+);
+CREATE TABLE IF NOT EXISTS global_totals (
+    n_doors INTEGER NOT NULL,
+    n_reveals INTEGER NOT NULL,
+    strategy TEXT NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (n_doors, n_reveals, strategy)
+);
+"""
+
+UPSERT_SESSION = """
+INSERT INTO session_totals (session_id, n_doors, n_reveals, strategy, games, wins)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (session_id, n_doors, n_reveals, strategy)
+DO UPDATE SET games = games + excluded.games, wins = wins + excluded.wins
+"""
+
+UPSERT_GLOBAL = """
+INSERT INTO global_totals (n_doors, n_reveals, strategy, games, wins) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (n_doors, n_reveals, strategy)
+DO UPDATE SET games = games + excluded.games, wins = wins + excluded.wins
+"""
+
+
+def _set_aside_unkeyed(conn):
+    """Rename tables from before totals were split by variant out of the way
+
+    Their games mix door and reveal counts, so they can't be merged in.
+    """
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(global_totals)')]
+    if columns and 'n_doors' not in columns:
+        with conn:
+            for table in ('session_totals', 'global_totals'):
+                conn.execute(f'ALTER TABLE {table} RENAME TO {table}_unkeyed')
+
+
+def _empty():
+    return {'wins': 0, 'games': 0}
+
+
+class StatsStore:
+    """Win/game counters per session and overall, persisted to SQLite
+
+    Every counter is for one game variant, (n_doors, n_reveals), since win
+    rates of different variants don't mean anything added together.
+
+    Outcomes are buffered in memory and written in one transaction once
+    `flush_every` recordings or `flush_interval` seconds have piled up.
+    Counters are kept pre-aggregated, so every read is a primary-key lookup.
+    Reads include the unflushed buffer.
+    """
+
+    def __init__(self, path='monty_hall_stats.db', flush_every=500, flush_interval=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Shared by the Streamlit script threads, guarded by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        _set_aside_unkeyed(self._conn)
+        self._conn.executescript(SCHEMA)
+        self._pending = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
+
+    def record(self, session_id, n_doors, n_reveals, strategy, won):
+        """Buffer a single finished game"""
+        self.record_many(session_id, n_doors, n_reveals, strategy, int(won), 1)
+
+    def record_many(self, session_id, n_doors, n_reveals, strategy, wins, games):
+        """Buffer a batch of games, e.g. from a batch simulation"""
+        with self._lock:
+            key = (session_id, n_doors, n_reveals, strategy)
+            counts = self._pending.setdefault(key, _empty())
+            counts['wins'] += wins
+            counts['games'] += games
+            self._pending_count += 1
+            due = (self._pending_count >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        session_rows = []
+        global_counts = {}
+        for (session_id, *global_key), counts in self._pending.items():
+            session_rows.append((session_id, *global_key, counts['games'], counts['wins']))
+            totals = global_counts.setdefault(tuple(global_key), _empty())
+            totals['wins'] += counts['wins']
+            totals['games'] += counts['games']
+        with self._conn:
+            self._conn.executemany(UPSERT_SESSION, session_rows)
+            self._conn.executemany(UPSERT_GLOBAL, [
+                (*global_key, counts['games'], counts['wins'])
+                for global_key, counts in global_counts.items()
+            ])
+        self._pending = {}
+        self._pending_count = 0
+
+    def session_totals(self, session_id, n_doors, n_reveals):
+        """{strategy: {'wins', 'games'}} for one session and variant"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT strategy, games, wins FROM session_totals '
+                'WHERE session_id = ? AND n_doors = ? AND n_reveals = ?',
+                (session_id, n_doors, n_reveals)).fetchall()
+            return self._with_pending(rows, lambda key: key[:3] == (session_id, n_doors, n_reveals))
+
+    def global_totals(self, n_doors, n_reveals):
+        """{strategy: {'wins', 'games'}} for one variant across every session"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT strategy, games, wins FROM global_totals '
+                'WHERE n_doors = ? AND n_reveals = ?', (n_doors, n_reveals)).fetchall()
+            return self._with_pending(rows, lambda key: key[1:3] == (n_doors, n_reveals))
+
+    def _with_pending(self, rows, matches):
+        totals = {strategy: {'wins': wins, 'games': games} for strategy, games, wins in rows}
+        for key, counts in self._pending.items():
+            if matches(key):
+                entry = totals.setdefault(key[3], _empty())
+                entry['wins'] += counts['wins']
+                entry['games'] += counts['games']
+        return totals
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_locked()
+            self._conn.close()
+            self._conn = None
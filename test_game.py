@@ -0,0 +1,282 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import simulation
+from charts import ConvergenceSeries
+from game_engine import _sample_excluding, reveal_goats, switch_door
+from game_log import GameLog, analyze
+from game_state import GameState
+from randomness import DoorSampler
+from sprites import get_door_sprite
+from stats_store import StatsStore
+
+# (n_doors, n_reveals): the classic game, both sides of the open/closed
+# storage switch, and the host leaving a single door closed
+CONFIGS = [(3, 1), (4, 1), (4, 2), (10, 4), (10, 5), (10, 8), (101, 50), (101, 99)]
+
+
+@pytest.mark.parametrize('excluded', [set(), {0}, {5}, {0, 9}, {3, 4, 5}])
+def test_sample_excluding_draws_distinct_allowed_values(excluded):
+    rng = DoorSampler(1)
+    for k in range(1, 10 - len(excluded) + 1):
+        for _ in range(50):
+            picks = _sample_excluding(10, k, excluded, rng)
+            assert len(set(picks)) == k
+            assert all(0 <= pick < 10 and pick not in excluded for pick in picks)
+
+
+@pytest.mark.parametrize('n_doors, n_reveals', CONFIGS)
+def test_reveal_opens_only_goats(n_doors, n_reveals):
+    rng = DoorSampler(2)
+    for _ in range(200):
+        car = rng.randrange(n_doors)
+        chosen = rng.randrange(n_doors)
+        reveal = reveal_goats(n_doors, chosen, car, n_reveals, rng)
+
+        opened = reveal.open_doors()
+        closed = reveal.closed_doors()
+        assert reveal.n_open == len(opened) == n_reveals
+        assert len(closed) == n_doors - 1 - n_reveals
+        assert sorted(opened + closed + [chosen]) == list(range(n_doors))
+        assert car not in opened and chosen not in opened
+        assert reveal.first_open() == opened[0]
+        assert [d for d in range(n_doors) if reveal.is_open(d)] == opened
+        # Both storage layouts keep the shorter side
+        assert len(reveal.doors) == min(len(opened), len(closed))
+
+        switched = switch_door(reveal, rng)
+        assert switched in closed
+
+
+@pytest.mark.parametrize('n_doors, n_reveals', [(2, 1), (3, 0), (3, 2), (10, 9)])
+def test_reveal_rejects_impossible_configs(n_doors, n_reveals):
+    with pytest.raises(ValueError):
+        reveal_goats(n_doors, 0, 1, n_reveals, DoorSampler(3))
+
+
+def _play(state, strategy, rng):
+    state.chosen_door = rng.randrange(state.n_doors)
+    state.reveal = reveal_goats(state.n_doors, state.chosen_door, state.car_position,
+                                state.n_reveals, state.rng)
+    state.phase = 'deciding'
+    if strategy == 'switch':
+        state.chosen_door = switch_door(state.reveal, state.rng)
+    state.record(strategy, state.chosen_door == state.car_position)
+    state.phase = 'finished'
+
+
+def _fields(state):
+    reveal = state.reveal
+    return (state.n_doors, state.n_reveals, state.phase, state.car_position, state.chosen_door,
+            state.animated, state.counts('stay'), state.counts('switch'), state.history(),
+            None if reveal is None else (reveal.chosen, reveal.doors, reveal.lists_open),
+            state.rng.key(), state.game_key)
+
+
+@pytest.mark.parametrize('n_doors, n_reveals', CONFIGS)
+def test_game_state_bytes_round_trip(n_doors, n_reveals):
+    rng = DoorSampler(4)
+    state = GameState(n_doors, n_reveals, history_size=8, rng=DoorSampler(5, 'sfc64'))
+    assert _fields(GameState.from_bytes(state.to_bytes())) == _fields(state)
+
+    # Enough games to wrap the history ring buffer, ending mid-game
+    for i in range(11):
+        _play(state, 'switch' if i % 3 else 'stay', rng)
+        state.new_game()
+    state.add('stay', 40, 100)
+    state.chosen_door = 0
+    state.reveal = reveal_goats(n_doors, 0, state.car_position, n_reveals, state.rng)
+    state.phase = 'deciding'
+    state.mark_animated(state.reveal.first_open())
+
+    restored = GameState.from_bytes(state.to_bytes())
+    assert _fields(restored) == _fields(state)
+    # The restored sampler continues the same stream
+    assert [restored.rng.randrange(n_doors) for _ in range(20)] == \
+        [state.rng.randrange(n_doors) for _ in range(20)]
+
+
+def test_game_state_rejects_other_versions():
+    data = bytearray(GameState().to_bytes())
+    data[0] += 1
+    with pytest.raises(ValueError):
+        GameState.from_bytes(bytes(data))
+
+
+@pytest.mark.parametrize('algorithm', ['pcg64', 'pcg64dxsm', 'philox', 'sfc64'])
+def test_sampler_key_resumes_stream(algorithm):
+    sampler = DoorSampler(0xABC, algorithm, batch=8)
+    for _ in range(13):
+        sampler.randrange(7)
+    key = sampler.key()
+    expected = [sampler.randrange(1000) for _ in range(40)] + list(sampler.integers(5, size=10))
+    resumed = DoorSampler.from_key(key)
+    assert [resumed.randrange(1000) for _ in range(40)] + list(resumed.integers(5, size=10)) \
+        == expected
+
+
+@pytest.mark.parametrize('n_doors, n_reveals', CONFIGS)
+def test_game_key_replays_game(n_doors, n_reveals):
+    rng = DoorSampler(6)
+    state = GameState(n_doors, n_reveals, rng=DoorSampler(7))
+    for _ in range(5):
+        _play(state, 'stay', rng)
+        state.new_game()
+    unpicked_key = state.game_key
+    state.chosen_door = rng.randrange(n_doors)
+    state.reveal = reveal_goats(n_doors, state.chosen_door, state.car_position, n_reveals,
+                                state.rng)
+    key = state.game_key
+    switched = switch_door(state.reveal, state.rng)
+
+    replay = GameState.from_key(key, n_doors, n_reveals)
+    assert replay.car_position == state.car_position
+    assert replay.first_pick == state.first_pick
+    assert replay.reveal.doors == state.reveal.doors
+    assert switch_door(replay.reveal, replay.rng) == switched
+
+    replay = GameState.from_key(unpicked_key)
+    assert (replay.car_position, replay.reveal) == (state.car_position, None)
+
+
+def test_game_key_rejects_other_variants():
+    key = GameState(3, 1, rng=DoorSampler(8)).game_key
+    assert GameState.from_key(key, 3, 1).n_doors == 3
+    with pytest.raises(ValueError):
+        GameState.from_key(key, 10, 1)
+    with pytest.raises(ValueError):
+        GameState.from_key(key, 3, 2)
+
+
+@pytest.mark.parametrize('key', ['', 'pcg64-abc', 'pcg64-xyz-1', 'mt19937-abc-0'])
+def test_malformed_key_raises(key):
+    with pytest.raises(ValueError):
+        DoorSampler.from_key(key)
+    with pytest.raises(ValueError):
+        GameState.from_key(f"3-1-_-{key}")
+
+
+@pytest.mark.parametrize('key', ['pcg64-abc-0', '3-1-pcg64-abc-0', '3-1-4-pcg64-abc-0',
+                                 '3-2-_-pcg64-abc-0', 'x-1-_-pcg64-abc-0'])
+def test_malformed_game_key_raises(key):
+    with pytest.raises(ValueError):
+        GameState.from_key(key)
+
+
+def test_game_log_drops_partial_row_before_appending(tmp_path):
+    log = GameLog(str(tmp_path), flush_every=1)
+    for _ in range(2):
+        log.append(300, 1, 5, 1, 2, 1, 'stay')
+    # Half a uint32 row, as a write cut short would leave
+    with open(tmp_path / 'doors-300-reveals-1' / 'car_position.bin', 'ab') as f:
+        f.write(b'\x07\x00')
+    assert analyze(str(tmp_path))[0]['games'] == 2
+
+    for _ in range(4):
+        log.append(300, 1, 5, 1, 2, 5, 'stay')
+    report = analyze(str(tmp_path))[0]
+    assert report['strategies']['stay']['wins'] == 4
+    assert report['strategies']['stay']['games'] == 6
+
+
+def test_door_sprite_rendered_once_per_process():
+    # The cache lives in an imported module, not the script Streamlit reruns
+    assert get_door_sprite.__module__ == 'sprites'
+    first = get_door_sprite(1, 'goat', True, True)
+    hits = get_door_sprite.cache_info().hits
+    assert get_door_sprite(1, 'goat', True, True) is first
+    assert get_door_sprite.cache_info().hits == hits + 1
+    assert first.startswith(b'\x89PNG')
+
+
+def test_stats_store_adds_up_flushed_and_pending_games(tmp_path):
+    store = StatsStore(str(tmp_path / 'stats.db'), flush_every=1000, flush_interval=1e9)
+    store.record('a', 3, 1, 'switch', True)
+    store.record_many('a', 3, 1, 'switch', 60, 100)
+    store.record_many('b', 3, 1, 'switch', 5, 10)
+    store.record_many('a', 10, 8, 'stay', 1, 10)
+    # Still buffered, and read back all the same
+    assert store.session_totals('a', 3, 1) == {'switch': {'wins': 61, 'games': 101}}
+    store.flush()
+    store.record_many('a', 3, 1, 'switch', 3, 4)
+    store.record('a', 3, 1, 'stay', False)
+
+    assert store.session_totals('a', 3, 1) == {'switch': {'wins': 64, 'games': 105},
+                                               'stay': {'wins': 0, 'games': 1}}
+    assert store.global_totals(3, 1) == {'switch': {'wins': 69, 'games': 115},
+                                         'stay': {'wins': 0, 'games': 1}}
+    assert store.global_totals(10, 8) == {'stay': {'wins': 1, 'games': 10}}
+    store.close()
+
+    store = StatsStore(str(tmp_path / 'stats.db'))
+    assert store.global_totals(3, 1)['switch'] == {'wins': 69, 'games': 115}
+    store.close()
+
+
+def test_stats_store_sets_aside_totals_without_variant(tmp_path):
+    path = str(tmp_path / 'stats.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE session_totals (session_id TEXT, strategy TEXT, games INTEGER, wins INTEGER);
+        CREATE TABLE global_totals (strategy TEXT, games INTEGER, wins INTEGER);
+        INSERT INTO global_totals VALUES ('switch', 10, 7);
+    """)
+    conn.close()
+
+    store = StatsStore(path)
+    assert store.global_totals(3, 1) == {}
+    store.record('a', 3, 1, 'switch', True)
+    store.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT * FROM global_totals_unkeyed').fetchall() == [('switch', 10, 7)]
+    assert conn.execute('SELECT * FROM global_totals').fetchall() == [(3, 1, 'switch', 1, 1)]
+    conn.close()
+
+
+@pytest.mark.parametrize('n_doors, n_reveals', [(3, 1), (10, 8)])
+def test_seeded_counts_identical_for_any_worker_count(monkeypatch, n_doors, n_reveals):
+    # Small chunks, so a short run is still split over every worker
+    monkeypatch.setattr(simulation, 'CHUNK_SIZE', 20_000)
+    runs = [simulation.simulate_games(130_000, n_doors, n_reveals, seed=42, workers=workers)
+            for workers in (1, 3, 2)]
+    assert runs[0] == runs[1] == runs[2]
+    assert runs[0]['stay']['games'] == 130_000
+
+
+def test_simulate_until_stops_at_budget_or_target():
+    short = simulation.simulate_until(0.001, 30_000, seed=9)
+    assert not short['converged']
+    assert short['stay']['games'] == short['switch']['games'] == 30_000
+
+    run = simulation.simulate_until(0.02, 10**7, seed=9)
+    assert run['converged']
+    assert run['switch']['games'] < 10**7 // 100
+    for low, high in run['intervals'].values():
+        assert high - low <= 0.02
+    low, high = run['intervals']['switch']
+    assert low < 2 / 3 < high
+
+
+@pytest.mark.parametrize('budget', [50, 400])
+def test_convergence_series_keeps_envelope_within_budget(budget):
+    won = np.random.default_rng(10).random(300_000) < 0.6
+    rates = np.cumsum(won) / np.arange(1, len(won) + 1)
+    series = ConvergenceSeries(budget)
+    # Uneven chunks, so buckets are left open across calls
+    for chunk in np.split(won, [1, 7, 500, 4_321, 90_000, 90_001, 250_000]):
+        series.extend(chunk)
+
+    x, y = series.points()
+    assert len(x) <= budget + 1
+    assert np.all(np.diff(x) > 0)
+    assert np.array_equal(y, rates[x.astype(int) - 1])
+    assert (x[-1], y[-1]) == (len(won), rates[-1])
+    assert y.min() == rates.min() and y.max() == rates.max()
+
+
+@pytest.mark.parametrize('n_games, workers', [(-1, 1), (10, 0)])
+def test_simulate_games_rejects_bad_counts(n_games, workers):
+    with pytest.raises(ValueError):
+        simulation.simulate_games(n_games, workers=workers)
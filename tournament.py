@@ -0,0 +1,88 @@
+import numpy as np
+
+from randomness import DEFAULT_ALGORITHM, make_generator
+from simulation import CHUNK_SIZE, draw_classic_games, wilson_interval
+
+# A strategy maps a batch of 3-door games to final choices. It's called as
+# strategy(first_choice, revealed_door, rng) with int8 arrays and returns
+# an array of final doors, so each one only adds its decision step.
+
+
+def stay(first_choice, revealed_door, rng):
+    return first_choice
+
+
+def switch(first_choice, revealed_door, rng):
+    return 3 - first_choice - revealed_door
+
+
+def random_switch(p):
+    """Switch with probability p"""
+    def strategy(first_choice, revealed_door, rng):
+        switching = rng.random(len(first_choice)) < p
+        return np.where(switching, 3 - first_choice - revealed_door, first_choice)
+    return strategy
+
+
+def switch_if_revealed(door):
+    """Switch only when the host opened `door`"""
+    def strategy(first_choice, revealed_door, rng):
+        return np.where(revealed_door == door, 3 - first_choice - revealed_door, first_choice)
+    return strategy
+
+
+def fixed_door(door):
+    """End on `door` whenever it's still closed, otherwise stay"""
+    def strategy(first_choice, revealed_door, rng):
+        return np.where(revealed_door == door, first_choice, np.int8(door))
+    return strategy
+
+
+def open_door(first_choice, revealed_door, rng):
+    """Adversarial: pick the goat the host just showed"""
+    return revealed_door
+
+
+def default_strategies(p=0.5, door=0):
+    return {
+        'Always stay': stay,
+        'Always switch': switch,
+        f'Random switch (p={p:g})': random_switch(p),
+        f'Switch if door {door + 1} opened': switch_if_revealed(door),
+        f'Always end on door {door + 1}': fixed_door(door),
+        'Pick the opened door': open_door,
+    }
+
+
+def run_tournament(strategies, n_games, seed=None, confidence=0.95, algorithm=DEFAULT_ALGORITHM):
+    """Play every strategy against the same generated games
+
+    The games are drawn once per chunk and shared, so adding a strategy only
+    costs its decision step. Returns rows ranked by win rate.
+    """
+    seed_seq = np.random.SeedSequence(seed)
+    game_rng, decision_rng = (make_generator(s, algorithm) for s in seed_seq.spawn(2))
+    wins = dict.fromkeys(strategies, 0)
+
+    remaining = n_games
+    while remaining > 0:
+        size = min(remaining, CHUNK_SIZE)
+        car_pos, first_choice, revealed_door = draw_classic_games(size, game_rng)
+        for name, strategy in strategies.items():
+            final_choice = strategy(first_choice, revealed_door, decision_rng)
+            wins[name] += int(np.count_nonzero(final_choice == car_pos))
+        remaining -= size
+
+    rows = []
+    for name, count in wins.items():
+        low, high = wilson_interval(count, n_games, confidence)
+        rows.append({
+            'strategy': name,
+            'wins': count,
+            'games': n_games,
+            'win_rate': count / n_games if n_games else 0.0,
+            'ci_low': low,
+            'ci_high': high,
+        })
+    rows.sort(key=lambda row: row['win_rate'], reverse=True)
+    return rows